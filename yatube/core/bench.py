@@ -0,0 +1,75 @@
+"""Общие помощники для команд-бенчмарков.
+
+Замеры выполняются на временной тестовой БД, поэтому рабочие данные
+не затрагиваются и не влияют на результат.
+"""
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import setup_databases, teardown_databases
+
+User = get_user_model()
+
+
+@contextmanager
+def bench_database(test_name=None):
+    """test_name - файл тестовой БД; по умолчанию SQLite создаёт её
+    в памяти, где нет ни WAL, ни настоящих блокировок файла."""
+    test_settings = connections[DEFAULT_DB_ALIAS].settings_dict['TEST']
+    default_name = test_settings['NAME']
+    if test_name is not None:
+        test_settings['NAME'] = test_name
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        test_settings['NAME'] = default_name
+
+
+def seed(users=1, groups=1, posts=0, batch_size=5000):
+    """Наполняет БД пользователями, группами и постами пачками.
+
+    Размер пачки пользователей и групп выбирает сам Django: явный
+    batch_size превышает лимиты SQLite на число строк в INSERT.
+    """
+    from posts.models import Group, Post
+
+    User.objects.bulk_create(
+        [User(username=f'bench_user_{i}') for i in range(users)]
+    )
+    Group.objects.bulk_create(
+        [Group(
+            title=f'Группа {i}',
+            slug=f'bench-group-{i}',
+            description=f'Описание группы {i}',
+        ) for i in range(groups)]
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    group_ids = list(Group.objects.values_list('id', flat=True))
+    for start in range(0, posts, batch_size):
+        Post.objects.bulk_create([
+            Post(
+                text=f'Пост для замеров №{i}',
+                author_id=user_ids[i % len(user_ids)],
+                group_id=group_ids[i % len(group_ids)] if group_ids else None,
+            ) for i in range(start, min(start + batch_size, posts))
+        ])
+
+
+def measure(func, repeat):
+    """Запускает func repeat раз, возвращает длительности в секундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
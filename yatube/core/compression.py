@@ -0,0 +1,74 @@
+"""Сжатие gzip и brotli для статики и ответов.
+
+brotli - необязательная зависимость: без пакета brotli доступен
+только gzip.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+
+
+def available_encodings():
+    """Кодировки в порядке предпочтения."""
+    if brotli is not None:
+        return (BROTLI, GZIP)
+    return (GZIP,)
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме запрещённых через q=0."""
+    encodings = set()
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if encoding:
+            encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class Compressor:
+    """Потоковый компрессор: compress() отдаёт сжатое по мере
+    поступления данных, finish() - остаток и конец потока."""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == BROTLI:
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            # wbits=31 - формат gzip, а не голый zlib.
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data, flush=False):
+        """flush=True выталкивает всё сжатое до этого места, чтобы
+        клиент получил кусок потока сразу."""
+        if self.encoding == BROTLI:
+            output = self._compressor.process(data)
+            if flush:
+                output += self._compressor.flush()
+            return output
+        output = self._compressor.compress(data)
+        if flush:
+            output += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return output
+
+    def finish(self):
+        if self.encoding == BROTLI:
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress(data, encoding, level):
+    compressor = Compressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
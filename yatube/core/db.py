@@ -0,0 +1,46 @@
+"""Настройка соединений с БД.
+
+PRAGMA из SQLITE_PRAGMAS выполняются для каждого нового соединения
+SQLite. Для постоянных соединений (CONN_MAX_AGE) с CONN_HEALTH_CHECKS
+перед каждым запросом проверяется, что соединение живо: в Django 2.2
+такой проверки нет, и оборванное соединение ломало бы запросы до
+истечения CONN_MAX_AGE.
+"""
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    cursor = connection.connection.cursor()
+    try:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def check_connection(connection):
+    """Закрывает соединение, если оно перестало отвечать; следующий
+    запрос к БД откроет новое."""
+    if connection.connection is None or not (
+        connection.settings_dict.get('CONN_HEALTH_CHECKS')
+    ):
+        return
+    try:
+        cursor = connection.connection.cursor()
+        cursor.execute('SELECT 1')
+        cursor.close()
+    except connection.Database.Error:
+        connection.close()
+
+
+@receiver(request_started)
+def check_persistent_connections(**kwargs):
+    for connection in connections.all():
+        check_connection(connection)
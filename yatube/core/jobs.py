@@ -0,0 +1,243 @@
+"""Очередь фоновых задач в таблице БД.
+
+Медленные побочные действия (письма, миниатюры) не выполняются
+в запросе: запрос только записывает задачу, а выполняет её воркер -
+команда run_jobs с пулом потоков. Задача записывается после
+изменений, которые её вызвали, поэтому воркер не увидит её раньше них.
+В одной транзакции с ними она оказывается, только если вызывающий
+код сам открыл atomic() (как админка); представления работают
+в автокоммите, и при сбое между записями изменение останется
+без задачи. Для миниатюр это не страшно: пропущенные находит
+команда make_thumbnails.
+
+Задачу берёт один воркер: захват - это UPDATE с условием на прежнее
+состояние. Упавшая задача повторяется с растущей паузой, а после
+JOBS_MAX_ATTEMPTS попыток остаётся в таблице с ошибкой. Каждая
+выполненная задача пишется строкой JSON в лог yatube.performance,
+глубину очереди и задержки показывает команда job_stats.
+"""
+import json
+import logging
+import random
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger('yatube.performance')
+
+# Сколько готовых задач просматривать за раз: если первую перехватил
+# другой воркер, пробуется следующая.
+CLAIM_CANDIDATES = 10
+
+
+def job(func=None, *, max_attempts=None):
+    """Помечает функцию как задачу очереди. Аргументы задачи должны
+    сериализоваться в JSON; у функции появляется метод delay."""
+    def decorate(func):
+        func.job_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        func.delay = lambda *args, **kwargs: enqueue(func, *args, **kwargs)
+        return func
+    if func is None:
+        return decorate
+    return decorate(func)
+
+
+def enqueue(func, *args, **kwargs):
+    return Job.objects.create(
+        name=func.job_name,
+        payload=json.dumps([args, kwargs], ensure_ascii=False),
+        max_attempts=func.max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def resolve(name):
+    func = import_string(name)
+    if getattr(func, 'job_name', None) != name:
+        raise ValueError(f'{name} не помечена как задача очереди.')
+    return func
+
+
+def retry_delay(attempts):
+    """Пауза перед следующей попыткой: удваивается с каждой попыткой,
+    а случайная скидка до половины разводит повторы задач, упавших
+    одновременно."""
+    delay = min(
+        settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.JOBS_RETRY_MAX_DELAY,
+    )
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def fail_timed_out(now):
+    """Задачи, у которых вышло время последней попытки, - неудачные.
+
+    Иначе задача, которая каждый раз роняет или вешает воркер,
+    забиралась бы снова и снова."""
+    # status__in=ACTIVE - условие частичного индекса job_ready_idx.
+    return Job.objects.filter(status__in=Job.ACTIVE, run_at__lte=now).filter(
+        status=Job.RUNNING, attempts__gte=F('max_attempts')
+    ).update(
+        status=Job.FAILED,
+        finished=now,
+        error='Время на последнюю попытку вышло.',
+    )
+
+
+def claim():
+    """Захватывает готовую задачу или возвращает None."""
+    now = timezone.now()
+    fail_timed_out(now)
+    candidates = Job.objects.filter(
+        status__in=Job.ACTIVE, run_at__lte=now
+    ).order_by('run_at', 'id').values_list('id', flat=True)
+    for pk in candidates[:CLAIM_CANDIDATES]:
+        claimed = Job.objects.filter(
+            pk=pk, status__in=Job.ACTIVE, run_at__lte=now
+        ).update(
+            status=Job.RUNNING,
+            attempts=F('attempts') + 1,
+            started=now,
+            run_at=now + timedelta(seconds=settings.JOBS_TIMEOUT),
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run(job):
+    """Выполняет захваченную задачу и записывает результат."""
+    started = time.perf_counter()
+    try:
+        args, kwargs = json.loads(job.payload)
+        resolve(job.name)(*args, **kwargs)
+    except Exception:
+        error = traceback.format_exc()
+    else:
+        error = ''
+    now = timezone.now()
+    if not error:
+        job.status = Job.DONE
+        job.finished = now
+    elif job.attempts < job.max_attempts:
+        job.status = Job.QUEUED
+        job.run_at = now + retry_delay(job.attempts)
+    else:
+        job.status = Job.FAILED
+        job.finished = now
+    job.error = error
+    # Если время на задачу вышло и её забрал другой воркер, число
+    # попыток уже другое, и результат этого воркера не записывается.
+    Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, attempts=job.attempts
+    ).update(
+        status=job.status,
+        run_at=job.run_at,
+        finished=job.finished,
+        error=job.error,
+    )
+    logger.info(json.dumps({
+        'event': 'job',
+        'name': job.name,
+        'status': job.status,
+        'attempt': job.attempts,
+        'wait_ms': round(
+            (job.started - job.created).total_seconds() * 1000, 3
+        ),
+        'run_ms': round((time.perf_counter() - started) * 1000, 3),
+    }))
+    return job.status == Job.DONE
+
+
+def purge():
+    """Удаляет выполненные задачи старше JOBS_KEEP_DONE секунд."""
+    before = timezone.now() - timedelta(seconds=settings.JOBS_KEEP_DONE)
+    return Job.objects.filter(
+        status=Job.DONE, finished__lt=before
+    ).delete()[0]
+
+
+def stats(window):
+    """Глубина очереди и задержки задач, выполненных за window секунд.
+
+    wait - от постановки в очередь до начала удачной попытки, вместе
+    с паузами между повторами; run - время выполнения."""
+    now = timezone.now()
+    ready = Job.objects.filter(status__in=Job.ACTIVE, run_at__lte=now)
+    oldest = ready.filter(status=Job.QUEUED).order_by('run_at').values_list(
+        'run_at', flat=True
+    ).first()
+    done = Job.objects.filter(
+        status=Job.DONE, finished__gte=now - timedelta(seconds=window)
+    ).values_list('created', 'started', 'finished')
+    return {
+        'ready': ready.filter(status=Job.QUEUED).count(),
+        'delayed': Job.objects.filter(
+            status=Job.QUEUED, run_at__gt=now
+        ).count(),
+        'running': Job.objects.filter(status=Job.RUNNING).count(),
+        'failed': Job.objects.filter(status=Job.FAILED).count(),
+        'oldest_ready': (now - oldest).total_seconds() if oldest else 0,
+        'wait': [(s - c).total_seconds() for c, s, f in done],
+        'run': [(f - s).total_seconds() for c, s, f in done],
+    }
+
+
+class Worker:
+    """Пул потоков, каждый из которых берёт и выполняет задачи.
+
+    Потоки подходят для задач, которые ждут диск, сеть или код на C
+    без GIL, как Pillow; у каждого потока своё соединение с БД."""
+
+    def __init__(self, threads=1, interval=1.0):
+        self.threads = threads
+        self.interval = interval
+        self.stopping = threading.Event()
+        self.purged_at = 0
+
+    def run_pending(self):
+        """Выполняет готовые задачи, пока они есть; возвращает их число."""
+        count = 0
+        while not self.stopping.is_set():
+            job = claim()
+            if job is None:
+                break
+            run(job)
+            count += 1
+        return count
+
+    def loop(self, burst=False):
+        try:
+            while not self.stopping.is_set():
+                if self.run_pending():
+                    continue
+                if burst:
+                    break
+                if time.monotonic() - self.purged_at > 60:
+                    self.purged_at = time.monotonic()
+                    purge()
+                self.stopping.wait(self.interval)
+        finally:
+            connections.close_all()
+
+    def work(self, burst=False):
+        """С burst=True потоки завершаются, когда готовых задач нет."""
+        with ThreadPoolExecutor(self.threads) as pool:
+            futures = [
+                pool.submit(self.loop, burst) for _ in range(self.threads)
+            ]
+            for future in futures:
+                future.result()
+
+    def stop(self):
+        self.stopping.set()
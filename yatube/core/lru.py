@@ -0,0 +1,74 @@
+"""Ограниченный LRU-кеш объектов в памяти процесса со сроком жизни.
+
+Подходит для небольшого, редко меняющегося набора строк, которые
+читаются на каждом запросе: попадание не делает ни запроса к БД,
+ни обращения к общему кешу. Кеш у каждого процесса свой; сигналы
+об изменениях сбрасывают его только в процессе, где изменение
+произошло, остальные увидят новое значение по истечении срока жизни.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """maxsize и timeout - функции без аргументов, чтобы размер и срок
+    брались из настроек при каждом обращении."""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, load):
+        """Значение по ключу; при промахе его вычисляет load(). Если
+        load() бросает исключение (например, Http404), ничего
+        не запоминается."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = load()
+        maxsize = self.maxsize()
+        if maxsize <= 0:
+            return value
+        with self.lock:
+            self.entries[key] = (now + self.timeout(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def discard(self, match):
+        """Удаляет значения, для которых match(value) истинно: ключ
+        объекта мог измениться вместе с ним."""
+        with self.lock:
+            for key in [
+                key for key, (_, value) in self.entries.items()
+                if match(value)
+            ]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
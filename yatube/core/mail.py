@@ -0,0 +1,13 @@
+from django.core.mail import EmailMultiAlternatives
+
+from .jobs import job
+
+
+@job
+def send_mail(subject, body, from_email, recipients, html=None):
+    """Отправляет письмо из воркера очереди: задержка почтового
+    бэкенда не попадает в запрос."""
+    message = EmailMultiAlternatives(subject, body, from_email, recipients)
+    if html is not None:
+        message.attach_alternative(html, 'text/html')
+    message.send()
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.bench import bench_database, measure, percentile, seed
+
+User = get_user_model()
+
+PROFILES = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': [
+            'django.contrib.auth.backends.ModelBackend',
+        ],
+    },
+    'cached': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['users.backends.CachedModelBackend'],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число запросов к БД и задержку ленты для вошедшего '
+        'пользователя с сессией и пользователем из БД и из кеша.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with bench_database():
+            seed(users=10, groups=1, posts=options['posts'])
+            user = User.objects.first()
+            url = reverse('posts:main_page')
+            self.stdout.write(
+                f'{"профиль":<8} {"запросов":>8} {"p50, мс":>8} '
+                f'{"p95, мс":>8}'
+            )
+            for name, profile in PROFILES.items():
+                with override_settings(**profile):
+                    caches['default'].clear()
+                    client = Client()
+                    client.force_login(user)
+                    # Прогрев: кеш ленты, сессии и пользователя.
+                    client.get(url)
+                    with CaptureQueriesContext(connection) as queries:
+                        client.get(url)
+                    # Список запросов читается из connection.queries,
+                    # который очищают следующие запросы клиента.
+                    captured = [query['sql'] for query in queries]
+                    timings = measure(
+                        lambda: client.get(url), options['repeat']
+                    )
+                self.stdout.write(
+                    f'{name:<8} {len(captured):>8} '
+                    f'{percentile(timings, 50) * 1000:>8.2f} '
+                    f'{percentile(timings, 95) * 1000:>8.2f}'
+                )
+                for sql in captured:
+                    self.stdout.write(f'    {sql[:100]}')
@@ -0,0 +1,64 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.bench import bench_database, measure, percentile, seed
+from core.compression import BROTLI, GZIP, brotli, compress
+from posts.models import Group
+
+LEVELS = {
+    GZIP: (1, 6, 9),
+    BROTLI: (1, 5, 11),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время сжатия и размер страниц index и group_list '
+        'при 10, 50 и 100 постах на странице для gzip и brotli '
+        'разных уровней.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        encodings = [GZIP] + ([BROTLI] if brotli is not None else [])
+        with bench_database():
+            seed(users=10, groups=1, posts=100)
+            group = Group.objects.get()
+            urls = {
+                'index': reverse('posts:main_page'),
+                'group_list': reverse('posts:group_list', args=(group.slug,)),
+            }
+            self.stdout.write(
+                f'{"страница":<11} {"постов":>6} {"байт":>7} '
+                f'{"сжатие":>9} {"байт":>6} {"доля":>6} '
+                f'{"p50, мс":>8} {"МБ/с":>7}'
+            )
+            for name, url in urls.items():
+                for per_page in (10, 50, 100):
+                    with override_settings(POSTS_ON_PAGE=per_page):
+                        caches['default'].clear()
+                        body = Client().get(url).content
+                    for encoding in encodings:
+                        for level in LEVELS[encoding]:
+                            self.report(
+                                name, per_page, body, encoding, level,
+                                options['repeat'],
+                            )
+        if brotli is None:
+            self.stdout.write('Пакет brotli не установлен, только gzip.')
+
+    def report(self, name, per_page, body, encoding, level, repeat):
+        size = len(compress(body, encoding, level))
+        timings = measure(lambda: compress(body, encoding, level), repeat)
+        p50 = percentile(timings, 50)
+        self.stdout.write(
+            f'{name:<11} {per_page:>6} {len(body):>7} '
+            f'{encoding + "-" + str(level):>9} {size:>6} '
+            f'{size / len(body):>6.1%} {p50 * 1000:>8.3f} '
+            f'{len(body) / p50 / 1e6:>7.1f}'
+        )
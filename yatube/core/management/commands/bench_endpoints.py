@@ -0,0 +1,171 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+
+from core.bench import bench_database, percentile, seed
+from posts.models import Post
+
+User = get_user_model()
+
+NAMESPACES = ('posts', 'users', 'about')
+# Эти страницы выполняют выход, поэтому их открывает гость.
+ANONYMOUS_ROUTES = ('users:logout',)
+
+
+def route_names(namespaces):
+    resolver = get_resolver()
+    for namespace in namespaces:
+        _, sub_resolver = resolver.namespace_dict[namespace]
+        for name in sub_resolver.reverse_dict:
+            if isinstance(name, str):
+                yield f'{namespace}:{name}'
+
+
+def route_params(name):
+    namespace, url_name = name.split(':')
+    _, sub_resolver = get_resolver().namespace_dict[namespace]
+    possibilities = sub_resolver.reverse_dict.getlist(url_name)[0][0]
+    return possibilities[0][1]
+
+
+def response_size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, число запросов к БД и размер ответа для '
+        'каждого именованного маршрута posts, users и about.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument(
+            '--route', action='append', dest='routes',
+            help='Замерить только указанные маршруты, например posts:profile.',
+        )
+        parser.add_argument('--output', help='Сохранить результат в JSON.')
+        parser.add_argument(
+            '--baseline', help='JSON прошлого запуска для сравнения.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=20.0,
+            help='Допустимый рост p95 относительно baseline, в процентах.',
+        )
+
+    def route_kwargs(self):
+        post = Post.objects.select_related('author', 'group').filter(
+            group__isnull=False
+        ).first()
+        return {
+            'any_slug': post.group.slug,
+            'username': post.author.username,
+            'post_id': post.pk,
+            'uidb64': 'MQ',
+            'token': 'set-password',
+        }, post.author
+
+    def measure_route(self, client, url, iterations):
+        client.get(url)
+        timings, queries, sizes = [], [], []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                size = response_size(response)
+                timings.append(time.perf_counter() - started)
+            queries.append(len(captured))
+            sizes.append(size)
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': percentile(timings, 50) * 1000,
+            'p95_ms': percentile(timings, 95) * 1000,
+            'p99_ms': percentile(timings, 99) * 1000,
+            'queries': percentile(queries, 50),
+            'bytes': percentile(sizes, 50),
+        }
+
+    def handle(self, *args, **options):
+        with bench_database():
+            self.stdout.write('Заполняем БД...')
+            seed(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+            )
+            params, author = self.route_kwargs()
+            author_client = Client()
+            author_client.force_login(author)
+            results = {}
+            for name in options['routes'] or route_names(NAMESPACES):
+                url = reverse(name, kwargs={
+                    key: params[key] for key in route_params(name)
+                })
+                client = Client() if name in ANONYMOUS_ROUTES else (
+                    author_client
+                )
+                results[name] = self.measure_route(
+                    client, url, options['iterations']
+                )
+                self.report(name, results[name])
+        report = {
+            'meta': {
+                'users': options['users'],
+                'groups': options['groups'],
+                'posts': options['posts'],
+                'iterations': options['iterations'],
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            'routes': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['threshold'])
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<32} {result["status"]} '
+            f'p50 {result["p50_ms"]:7.2f} ms  '
+            f'p95 {result["p95_ms"]:7.2f} ms  '
+            f'p99 {result["p99_ms"]:7.2f} ms  '
+            f'queries {result["queries"]:3}  bytes {result["bytes"]}'
+        )
+
+    def compare(self, results, baseline_path, threshold):
+        with open(baseline_path) as file:
+            baseline = json.load(file)['routes']
+        regressions = []
+        for name, result in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            limit = previous['p95_ms'] * (1 + threshold / 100)
+            if result['p95_ms'] > limit:
+                regressions.append(
+                    f'{name}: p95 {result["p95_ms"]:.2f} ms, '
+                    f'было {previous["p95_ms"]:.2f} ms'
+                )
+            if result['queries'] > previous['queries']:
+                regressions.append(
+                    f'{name}: запросов {result["queries"]}, '
+                    f'было {previous["queries"]}'
+                )
+        if regressions:
+            raise CommandError(
+                'Регрессия производительности:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий не найдено.'))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from core import jobs
+from core.bench import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает глубину очереди задач и задержки задач, выполненных '
+        'за последние --window секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, default=60 * 60)
+
+    def handle(self, *args, **options):
+        stats = jobs.stats(options['window'])
+        self.stdout.write(
+            f'Готовы к выполнению: {stats["ready"]}, '
+            f'ждут повтора: {stats["delayed"]}, '
+            f'выполняются: {stats["running"]}, '
+            f'не удались: {stats["failed"]}'
+        )
+        self.stdout.write(
+            f'Самая старая готовая задача ждёт '
+            f'{stats["oldest_ready"]:.1f} с'
+        )
+        if not stats['wait']:
+            self.stdout.write('За это время задач не выполнялось.')
+            return
+        self.stdout.write(
+            f'Выполнено: {len(stats["wait"])}; '
+            f'{"мс":<6} {"p50":>9} {"p95":>9} {"max":>9}'
+        )
+        for name in ('wait', 'run'):
+            values = stats[name]
+            self.stdout.write(
+                f'{name:<6} '
+                + ' '.join(
+                    f'{percentile(values, p) * 1000:>9.1f}' for p in (50, 95)
+                )
+                + f' {max(values) * 1000:>9.1f}'
+            )
@@ -0,0 +1,30 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задачи фоновой очереди пулом потоков. С --burst '
+        'завершается, когда готовых задач не остаётся; иначе ждёт новые, '
+        'проверяя очередь раз в --interval секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.JOBS_WORKER_THREADS
+        )
+        parser.add_argument('--interval', type=float, default=1)
+        parser.add_argument('--burst', action='store_true')
+
+    def handle(self, *args, **options):
+        worker = Worker(options['threads'], options['interval'])
+        # Выполняющиеся задачи доделываются, новые не берутся.
+        signal.signal(signal.SIGTERM, lambda *args: worker.stop())
+        try:
+            worker.work(burst=options['burst'])
+        except KeyboardInterrupt:
+            worker.stop()
@@ -0,0 +1,73 @@
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.bench import bench_database
+from core.compression import brotli
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает статику с хешами и сжатыми копиями во временный '
+        'каталог и считает байты статики, которые загружает главная '
+        'страница: без сжатия, с gzip и с brotli.'
+    )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as static_root, override_settings(
+            DEBUG=False,
+            STATIC_ROOT=static_root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            with bench_database():
+                page = Client().get('/').content.decode()
+            names = sorted(set(re.findall(
+                re.escape(settings.STATIC_URL) + r'([^"\'\s>]+)', page
+            )))
+            self.report(static_root, names)
+
+    def report(self, static_root, names):
+        # Что отдаётся клиенту с поддержкой кодировки: без копии .br -
+        # копия .gz, без сжатых копий - сам файл.
+        fallbacks = {'': ('',), '.gz': ('.gz', ''), '.br': ('.br', '.gz', '')}
+        totals = dict.fromkeys(fallbacks, 0)
+        self.stdout.write(f'{"файл":<50} {"байт":>9} {"gzip":>9} {"br":>9}')
+        for name in names:
+            path = os.path.join(static_root, name)
+            sizes = {}
+            for suffix, variants in fallbacks.items():
+                served = next(
+                    path + variant for variant in variants
+                    if os.path.exists(path + variant)
+                )
+                sizes[suffix] = os.path.getsize(served)
+                totals[suffix] += sizes[suffix]
+            self.stdout.write(
+                f'{name:<50} {sizes[""]:>9} {sizes[".gz"]:>9} '
+                f'{sizes[".br"]:>9}'
+            )
+        self.stdout.write(
+            f'{"всего":<50} {totals[""]:>9} {totals[".gz"]:>9} '
+            f'{totals[".br"]:>9}'
+        )
+        best = '.br' if brotli is not None else '.gz'
+        saved = totals[''] - totals[best]
+        self.stdout.write(
+            f'Первая загрузка страницы: экономия {saved} байт '
+            f'({saved / max(totals[""], 1):.1%}). Повторные загрузки: '
+            f'{len(names)} файлов с хешем в имени берутся из кеша '
+            f'браузера без запросов на перепроверку.'
+        )
+        if brotli is None:
+            self.stdout.write(
+                'Пакет brotli не установлен, копии .br не создаются.'
+            )
@@ -0,0 +1,123 @@
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import (
+    DEFAULT_DB_ALIAS, OperationalError, close_old_connections, connections,
+)
+from django.test.utils import override_settings
+
+from core.bench import bench_database, seed
+from posts.models import Post
+
+PROFILES = {
+    # Настройки SQLite по умолчанию; journal_mode=delete возвращает
+    # файл из WAL, если он остался после прошлого прогона.
+    'default': {
+        'pragmas': {'journal_mode': 'delete'},
+        'conn_max_age': 0,
+    },
+    'production': {
+        'pragmas': settings.SQLITE_PRODUCTION_PRAGMAS,
+        'conn_max_age': 600,
+    },
+}
+
+
+class Worker(threading.Thread):
+    def __init__(self, operation, deadline):
+        super().__init__()
+        self.operation = operation
+        self.deadline = deadline
+        self.done = 0
+        self.locked = 0
+        self.failed = 0
+
+    def run(self):
+        while time.perf_counter() < self.deadline:
+            try:
+                self.operation()
+                self.done += 1
+            except OperationalError as error:
+                if 'locked' in str(error):
+                    self.locked += 1
+                else:
+                    self.failed += 1
+                connections[DEFAULT_DB_ALIAS].close()
+            # Как в конце HTTP-запроса: соединение закрывается, если
+            # CONN_MAX_AGE не разрешает его переиспользовать.
+            close_old_connections()
+        connections[DEFAULT_DB_ALIAS].close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает файловую SQLite параллельными чтениями и записями '
+        'и сравнивает профили БД: пропускную способность и долю '
+        'ошибок "database is locked".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument(
+            '--profile', action='append', dest='profiles',
+            choices=PROFILES, help='По умолчанию - все профили.',
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            test_name = os.path.join(directory, 'stress.sqlite3')
+            with bench_database(test_name):
+                seed(users=100, groups=10, posts=options['posts'])
+                self.author_ids = list(
+                    Post.objects.values_list('author_id', flat=True)
+                    .distinct()
+                )
+                connections.close_all()
+                for name in options['profiles'] or PROFILES:
+                    self.run_profile(name, PROFILES[name], options)
+
+    def read(self):
+        list(Post.objects.select_related('author', 'group')[:10])
+
+    def write(self):
+        Post.objects.create(
+            author_id=random.choice(self.author_ids),
+            text='Пост под нагрузкой',
+        )
+
+    def run_profile(self, name, profile, options):
+        database = connections.databases[DEFAULT_DB_ALIAS]
+        database['CONN_MAX_AGE'] = profile['conn_max_age']
+        deadline = time.perf_counter() + options['seconds']
+        workers = (
+            [Worker(self.read, deadline) for _ in range(options['readers'])]
+            + [Worker(self.write, deadline)
+               for _ in range(options['writers'])]
+        )
+        with override_settings(SQLITE_PRAGMAS=profile['pragmas']):
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        database['CONN_MAX_AGE'] = 0
+        readers = workers[:options['readers']]
+        writers = workers[options['readers']:]
+        self.stdout.write(f'Профиль {name}:')
+        for title, group in (('чтение', readers), ('запись', writers)):
+            done = sum(worker.done for worker in group)
+            locked = sum(worker.locked for worker in group)
+            failed = sum(worker.failed for worker in group)
+            attempts = done + locked + failed
+            self.stdout.write(
+                f'  {title}: {done / options["seconds"]:9.1f} оп/с, '
+                f'database is locked {locked} '
+                f'({locked / max(attempts, 1):.2%}), других ошибок {failed}'
+            )
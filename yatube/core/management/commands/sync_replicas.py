@@ -0,0 +1,52 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную БД SQLite в файлы реплик из DATABASE_REPLICAS. '
+        'Запущенная с --interval, имитирует отставание репликации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять копирование каждые N секунд.',
+        )
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError(
+                'Копировать можно только SQLite; для других СУБД '
+                'настройте репликацию средствами самой СУБД.'
+            )
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                'Реплик нет: задайте их число в YATUBE_DB_REPLICAS.'
+            )
+        while True:
+            self.sync(primary)
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def sync(self, primary):
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias]
+            # Соединение с устаревшей копией закрываем, чтобы следующий
+            # запрос открыл уже обновлённый файл.
+            replica.close()
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                # backup() копирует согласованный снимок постранично,
+                # не блокируя запись в основную БД надолго.
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: скопирована основная БД')
@@ -0,0 +1,249 @@
+import json
+import logging
+import mimetypes
+import os
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import routers, timing
+from .compression import (
+    BROTLI, GZIP, Compressor, accepted_encodings, available_encodings,
+)
+
+logger = logging.getLogger('yatube.performance')
+
+
+class ServerTimingMiddleware:
+    """Замеряет SQL, шаблоны и весь запрос для доли запросов.
+
+    Результат уходит в заголовок Server-Timing и строкой JSON в лог
+    yatube.performance. Доля задаётся SERVER_TIMING_SAMPLE_RATE: запросы
+    вне выборки проходят без замеров и почти без накладных расходов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = settings.SERVER_TIMING_SAMPLE_RATE
+        if sample_rate <= 0 or random.random() >= sample_rate:
+            return self.get_response(request)
+        timings, token = timing.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.sql_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            timings.total_time = time.perf_counter() - started
+            timing.stop(token)
+        response['Server-Timing'] = (
+            f'sql;dur={timings.sql_time * 1000:.3f};'
+            f'desc="{timings.sql_count} queries", '
+            f'tpl;dur={timings.template_time * 1000:.3f}, '
+            f'total;dur={timings.total_time * 1000:.3f}'
+        )
+        if not logger.isEnabledFor(logging.INFO):
+            return response
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'event': 'request_timing',
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **timings.as_dict(),
+        }))
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Read-your-writes при чтении с реплик.
+
+    Если запрос что-то записал в основную БД, ответ ставит cookie,
+    и следующие REPLICA_PIN_SECONDS секунд запросы посетителя читают
+    из основной БД, пока реплики её догоняют.
+    """
+    cookie_name = 'pin_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinning, token = routers.start(
+            pinned=self.cookie_name in request.COOKIES
+        )
+        primary = connections[DEFAULT_DB_ALIAS]
+        try:
+            with primary.execute_wrapper(routers.record_writes):
+                response = self.get_response(request)
+        finally:
+            routers.stop(token)
+        if pinning.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class PrecompressedStaticMiddleware:
+    """Отдаёт статику из STATIC_ROOT без веб-сервера перед Django.
+
+    Если клиент принимает brotli или gzip, отдаётся сжатая копия,
+    заранее записанная collectstatic (см. core/storage.py). Файлы
+    с хешем в имени не меняются, поэтому кешируются на год без
+    перепроверок. Включается настройкой SERVE_STATIC.
+    """
+    # Кодировка и расширение сжатой копии, в порядке предпочтения.
+    encodings = ((BROTLI, '.br'), (GZIP, '.gz'))
+    immutable_cache_control = 'public, max-age=31536000, immutable'
+    cache_control = 'public, max-age=3600'
+
+    def __init__(self, get_response):
+        if not settings.SERVE_STATIC:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.hashed_names = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values()
+        )
+
+    def __call__(self, request):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or not request.path.startswith(self.prefix)
+        ):
+            return self.get_response(request)
+        name = request.path[len(self.prefix):]
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return self.get_response(request)
+        if not os.path.isfile(path):
+            return self.get_response(request)
+        return self.serve(request, name, path)
+
+    def serve(self, request, name, path):
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding = None
+        for candidate, suffix in self.encodings:
+            if candidate in accepted and os.path.isfile(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+        stat = os.stat(path)
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size,
+        ):
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(name)[0]
+            response = FileResponse(
+                open(path, 'rb'),
+                content_type=content_type or 'application/octet-stream',
+            )
+            response['Last-Modified'] = http_date(stat.st_mtime)
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = (
+            self.immutable_cache_control if name in self.hashed_names
+            else self.cache_control
+        )
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает текстовые ответы gzip или brotli (если установлен).
+
+    Кодировка выбирается по Accept-Encoding, brotli предпочтительнее.
+    Маленькие ответы не сжимаются: заголовки и кадр сжатия съели бы
+    выигрыш. Потоковые ответы сжимаются по кускам, каждый кусок сразу
+    уходит клиенту. Уровни сжатия задают COMPRESSION_GZIP_LEVEL
+    и COMPRESSION_BROTLI_LEVEL, порог - COMPRESSION_MIN_LENGTH.
+    """
+    compressible_types = (
+        'text/', 'application/json', 'application/x-ndjson',
+        'application/javascript', 'application/xml', 'application/rss+xml',
+        'application/atom+xml', 'image/svg+xml',
+    )
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.choose_encoding(request)
+        if encoding is None:
+            return response
+        compressor = Compressor(encoding, self.level(encoding))
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                compressor, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            content = response.content
+            if len(content) < settings.COMPRESSION_MIN_LENGTH:
+                return response
+            compressed = compressor.compress(content) + compressor.finish()
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        # Сжатое тело отличается побайтно, строгий ETag стал бы ложью.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def is_compressible(self, response):
+        content_type = response.get('Content-Type', '')
+        return (
+            response.status_code == 200
+            and not response.has_header('Content-Encoding')
+            and content_type.startswith(self.compressible_types)
+        )
+
+    def choose_encoding(self, request):
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        for encoding in available_encodings():
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def level(self, encoding):
+        if encoding == BROTLI:
+            return settings.COMPRESSION_BROTLI_LEVEL
+        return settings.COMPRESSION_GZIP_LEVEL
+
+    def compress_stream(self, compressor, chunks):
+        for chunk in chunks:
+            output = compressor.compress(chunk, flush=True)
+            if output:
+                yield output
+        yield compressor.finish()
@@ -0,0 +1,53 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Задача фоновой очереди: функция, помеченная core.jobs.job,
+    и её аргументы в JSON. Выполняет команда run_jobs."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Не удалась'),
+    )
+    # Задачи, которые воркер может взять: ждущие своего времени
+    # и выполняющиеся, если воркер пропал и время на них вышло.
+    ACTIVE = (QUEUED, RUNNING)
+
+    name = models.CharField('Функция', max_length=200)
+    payload = models.TextField('Аргументы')
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Наибольшее число попыток')
+    created = models.DateTimeField('Поставлена', default=timezone.now)
+    # Для задачи в очереди - когда её можно брать, для выполняющейся -
+    # когда её может забрать другой воркер.
+    run_at = models.DateTimeField('Выполнить после', default=timezone.now)
+    started = models.DateTimeField('Начата', blank=True, null=True)
+    finished = models.DateTimeField('Завершена', blank=True, null=True)
+    error = models.TextField('Ошибка', blank=True)
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('run_at', 'id'),
+                name='job_ready_idx',
+                condition=Q(status__in=('queued', 'running')),
+            ),
+            models.Index(
+                fields=('status', 'finished'), name='job_status_finished_idx'
+            ),
+        )
+        verbose_name = 'задача'
+        verbose_name_plural = 'задачи'
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
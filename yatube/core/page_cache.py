@@ -0,0 +1,116 @@
+"""Кеш целых страниц для анонимных посетителей.
+
+Шапка сайта зависит от пользователя, поэтому страницу целиком можно
+кешировать только для гостя. Гостем считается запрос без cookie
+сессии и без cookie CSRF: у вошедшего есть сессия, а cookie CSRF
+значит, что посетителю уже отдавали формы с его токеном. Проверка
+не трогает ни сессию, ни пользователя, так что ответ из кеша
+отдаётся без запросов к БД.
+
+Ключ - путь с параметрами запроса, а версией страницы служит её ETag
+из posts.cache: изменения постов меняют версию. Новую версию собирает
+один запрос, остальные тем временем получают прежнюю копию
+(core/single_flight.py).
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.http import http_date
+
+from . import single_flight
+
+# Заголовки, которые сохраняются вместе с телом страницы.
+STORED_HEADERS = ('Content-Type', 'Content-Language')
+
+
+def page_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def is_anonymous(request):
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and settings.CSRF_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def page_cache_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{path}'
+
+
+def is_cacheable(request, response):
+    # Страница с формой выдала гостю токен CSRF, его cookie поставит
+    # CsrfViewMiddleware уже после представления.
+    return (
+        not request.META.get('CSRF_COOKIE_USED')
+        and response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not response.has_header('Cache-Control')
+    )
+
+
+def snapshot(request, response):
+    """Тело и заголовки страницы для кеша или None."""
+    if not is_cacheable(request, response):
+        return None
+    return response.content, [
+        (name, response[name]) for name in STORED_HEADERS
+        if response.has_header(name)
+    ]
+
+
+def from_entry(entry, version):
+    content, headers = entry.value
+    response = HttpResponse(content)
+    for name, value in headers:
+        response[name] = value
+    if entry.version != version:
+        # Устаревшая копия отдаётся со своими ETag и временем сборки,
+        # чтобы клиент не запомнил её под новой версией.
+        response['ETag'] = entry.version
+        response['Last-Modified'] = http_date(entry.built)
+    return response
+
+
+def cache_anonymous_page(version_func=None):
+    """Кеширует ответы GET для гостей.
+
+    version_func - ETag-функция представления: получает его аргументы
+    и возвращает ETag страницы или None, если страницу сейчас кешировать
+    нельзя. Без неё страница живёт PAGE_CACHE_TIMEOUT секунд."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            version = None
+            if request.method in ('GET', 'HEAD') and is_anonymous(request):
+                version = 'static'
+                if version_func is not None:
+                    version = version_func(request, *args, **kwargs)
+            if version is None or settings.PAGE_CACHE_TIMEOUT <= 0:
+                return view(request, *args, **kwargs)
+            response = None
+
+            def build():
+                nonlocal response
+                response = view(request, *args, **kwargs)
+                if callable(getattr(response, 'render', None)):
+                    # Токен CSRF может понадобиться только при отрисовке.
+                    response.render()
+                return snapshot(request, response)
+
+            entry = single_flight.fetch(
+                page_cache(), page_cache_key(request), version, build,
+                settings.PAGE_CACHE_TIMEOUT,
+            )
+            if response is not None:
+                return response
+            if entry.value is None:
+                return view(request, *args, **kwargs)
+            return from_entry(entry, version)
+        return wrapper
+    return decorator
@@ -0,0 +1,80 @@
+"""Маршрутизация запросов к БД: чтение с реплик, запись в основную.
+
+Чтобы посетитель сразу видел свои правки, после записи его запросы
+какое-то время идут только в основную БД (см. ReplicaPinningMiddleware).
+Записью считается выполненный INSERT, UPDATE или DELETE (record_writes),
+а не вызов db_for_write: Django спрашивает его и без записи, например
+при присваивании связи несохранённому объекту. Состояние текущего
+запроса хранится в contextvar; вне запросов (команды, воркер очереди)
+чтение идёт из основной БД.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Приложения, которые всегда читают из основной БД: устаревшая сессия
+# с реплики разлогинила бы пользователя, а воркер очереди задач
+# по устаревшей копии брал бы уже выполненные задачи.
+PRIMARY_APPS = ('sessions', 'core')
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_pinning = ContextVar('replica_pinning', default=None)
+
+
+class Pinning:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def start(pinned=False):
+    pinning = Pinning(pinned)
+    return pinning, _pinning.set(pinning)
+
+
+def stop(token):
+    _pinning.reset(token)
+
+
+def is_pinned():
+    pinning = _pinning.get()
+    return pinning is None or pinning.pinned
+
+
+def pin_to_primary():
+    pinning = _pinning.get()
+    if pinning is not None:
+        pinning.pinned = pinning.wrote = True
+
+
+def record_writes(execute, sql, params, many, context):
+    """execute_wrapper основной БД: после записи запрос закреплён."""
+    if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        pin_to_primary()
+    return execute(sql, params, many, context)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or is_pinned()
+            or model._meta.app_label in PRIMARY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии основной БД, связи между ними допустимы.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
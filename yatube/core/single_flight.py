@@ -0,0 +1,63 @@
+"""Перестройка кешированного значения одним запросом.
+
+После изменения поста версия ленты меняется, и все копии страницы
+устаревают разом. Чтобы сотни одновременных запросов не перестраивали
+одну и ту же страницу, перестраивает её только тот, кто первым занял
+блокировку cache.add: она общая для потоков и процессов, если бэкенд
+кеша общий. Остальные получают прежнюю копию (stale-while-revalidate),
+а если её нет - ждут новую до SINGLE_FLIGHT_WAIT секунд.
+
+Значение хранится под постоянным ключом вместе с версией и временем
+сборки, поэтому устаревшая копия остаётся доступной после смены версии.
+"""
+import time
+from collections import namedtuple
+
+from django.conf import settings
+
+# value - None, если собранное значение кешировать нельзя: тогда
+# каждый запрос собирает его сам, не дожидаясь других.
+Entry = namedtuple('Entry', ('version', 'built', 'value'))
+
+POLL_INTERVAL = 0.05
+
+
+def lock_key(key, version):
+    return f'{key}:rebuild:{version}'
+
+
+def store(cache, key, version, value, timeout):
+    entry = Entry(version, time.time(), value)
+    cache.set(key, tuple(entry), timeout)
+    return entry
+
+
+def fetch(cache, key, version, build, timeout):
+    """Запись для версии version; устаревшая, если значение сейчас
+    перестраивает другой запрос.
+
+    build() собирает значение и возвращает то, что нужно положить
+    в кеш, или None."""
+    entry = cache.get(key)
+    if entry is not None and entry[0] == version:
+        return Entry(*entry)
+    lock = lock_key(key, version)
+    if cache.add(lock, True, settings.SINGLE_FLIGHT_LOCK_TIMEOUT):
+        try:
+            # Сборщик мог закончить и снять блокировку, пока этот
+            # запрос читал устаревшую копию.
+            fresh = cache.get(key)
+            if fresh is not None and fresh[0] == version:
+                return Entry(*fresh)
+            return store(cache, key, version, build(), timeout)
+        finally:
+            cache.delete(lock)
+    if entry is not None:
+        return Entry(*entry)
+    deadline = time.monotonic() + settings.SINGLE_FLIGHT_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry[0] == version:
+            return Entry(*entry)
+    return store(cache, key, version, build(), timeout)
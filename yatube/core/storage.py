@@ -0,0 +1,51 @@
+"""Хранилище статики с хешами в именах и заранее сжатыми копиями.
+
+collectstatic кладёт рядом с каждым файлом с хешем в имени его сжатые
+версии: .gz всегда и .br, если установлен пакет brotli. Отдаёт их
+PrecompressedStaticMiddleware из core/middleware.py.
+"""
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .compression import BROTLI, GZIP, available_encodings, compress
+
+# Картинки PNG, JPEG и шрифты WOFF уже сжаты.
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.xml', '.json', '.map', '.html',
+)
+# Сжатая копия сохраняется, только если она меньше хотя бы на 5%.
+MIN_RATIO = 0.95
+
+# Расширение сжатой копии и наибольший уровень сжатия: сборка
+# делается один раз, и время на неё не жалко.
+VARIANTS = {
+    GZIP: ('.gz', 9),
+    BROTLI: ('.br', 11),
+}
+
+
+def is_compressible(name):
+    return os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if processed is True and not dry_run and is_compressible(name):
+                self.compress(hashed_name)
+            yield name, hashed_name, processed
+
+    def compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        for encoding in available_encodings():
+            suffix, level = VARIANTS[encoding]
+            compressed = compress(content, encoding, level)
+            if len(compressed) < len(content) * MIN_RATIO:
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
@@ -0,0 +1,62 @@
+import os
+import tempfile
+
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import TestCase, override_settings
+
+from ..db import apply_sqlite_pragmas, check_connection
+
+
+def pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class SqlitePragmasTests(TestCase):
+    def test_pragmas_applied(self):
+        """PRAGMA из SQLITE_PRAGMAS выполняются для соединения."""
+        default = pragma('cache_size')
+        with override_settings(SQLITE_PRAGMAS={'cache_size': -1234}):
+            apply_sqlite_pragmas(None, connection)
+            self.assertEqual(pragma('cache_size'), -1234)
+        with override_settings(SQLITE_PRAGMAS={'cache_size': default}):
+            apply_sqlite_pragmas(None, connection)
+        self.assertEqual(pragma('cache_size'), default)
+
+
+class HealthCheckTests(TestCase):
+    def make_connection(self, health_checks):
+        # Закрытие соединения с БД в памяти SQLite-бэкенд игнорирует.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        wrapper = DatabaseWrapper({
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory.name, 'db.sqlite3'),
+            'ATOMIC_REQUESTS': False,
+            'AUTOCOMMIT': True,
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': health_checks,
+            'OPTIONS': {},
+            'TIME_ZONE': None,
+            'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '',
+        })
+        wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_broken_connection_closed(self):
+        """Оборванное постоянное соединение закрывается до запроса."""
+        wrapper = self.make_connection(health_checks=True)
+        check_connection(wrapper)
+        self.assertIsNotNone(wrapper.connection)
+        wrapper.connection.close()
+        check_connection(wrapper)
+        self.assertIsNone(wrapper.connection)
+
+    def test_checks_disabled(self):
+        wrapper = self.make_connection(health_checks=False)
+        wrapper.connection.close()
+        check_connection(wrapper)
+        self.assertIsNotNone(wrapper.connection)
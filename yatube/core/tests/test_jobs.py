@@ -0,0 +1,154 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import jobs
+from ..models import Job
+
+User = get_user_model()
+
+calls = []
+
+
+@jobs.job
+def record(value, suffix=''):
+    calls.append(value + suffix)
+
+
+@jobs.job(max_attempts=2)
+def fail():
+    raise RuntimeError('Сбой почтового сервера')
+
+
+def not_a_job():
+    pass
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        """Задача сохраняется с аргументами и выполняется воркером."""
+        record.delay('пост', suffix='!')
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'core.tests.test_jobs.record')
+        self.assertEqual(json.loads(job.payload), [['пост'], {'suffix': '!'}])
+        self.assertEqual(jobs.Worker().run_pending(), 1)
+        self.assertEqual(calls, ['пост!'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.finished)
+
+    @override_settings(JOBS_RETRY_DELAY=10)
+    def test_retry_with_backoff(self):
+        """Упавшая задача откладывается, а после последней попытки
+        остаётся с ошибкой."""
+        fail.delay()
+        before = timezone.now()
+        jobs.run(jobs.claim())
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreaterEqual(job.run_at, before + timedelta(seconds=5))
+        self.assertLessEqual(
+            job.run_at, timezone.now() + timedelta(seconds=10)
+        )
+        self.assertIn('Сбой почтового сервера', job.error)
+        self.assertIsNone(jobs.claim(), 'Пауза перед повтором не прошла.')
+
+        Job.objects.update(run_at=timezone.now())
+        jobs.run(jobs.claim())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(
+        JOBS_RETRY_DELAY=10, JOBS_RETRY_MAX_DELAY=60, JOBS_TIMEOUT=60
+    )
+    def test_retry_delay(self):
+        for attempts, longest in ((1, 10), (2, 20), (3, 40), (10, 60)):
+            with self.subTest(attempts=attempts):
+                delay = jobs.retry_delay(attempts).total_seconds()
+                self.assertGreaterEqual(delay, longest / 2)
+                self.assertLessEqual(delay, longest)
+
+    @override_settings(JOBS_TIMEOUT=60)
+    def test_claim_once(self):
+        """Выполняющуюся задачу другой воркер берёт, только когда время
+        на неё вышло."""
+        record.delay('пост')
+        self.assertIsNotNone(jobs.claim())
+        self.assertIsNone(jobs.claim())
+        Job.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.claim().attempts, 2)
+
+    @override_settings(JOBS_TIMEOUT=60)
+    def test_timed_out_last_attempt_fails(self):
+        """Задача, чья последняя попытка не уложилась во время
+        (воркер упал или завис), не берётся снова."""
+        fail.delay()
+        for attempt in (1, 2):
+            self.assertEqual(jobs.claim().attempts, attempt)
+            Job.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(jobs.claim())
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished)
+
+    def test_only_marked_functions(self):
+        Job.objects.create(
+            name='core.tests.test_jobs.not_a_job', payload='[[], {}]',
+            max_attempts=1,
+        )
+        jobs.run(jobs.claim())
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('не помечена', job.error)
+
+    def test_stats(self):
+        record.delay('первая')
+        record.delay('вторая')
+        jobs.run(jobs.claim())
+        fail.delay()
+        Job.objects.filter(name__endswith='fail').update(
+            status=Job.FAILED
+        )
+        stats = jobs.stats(window=60)
+        self.assertEqual(stats['ready'], 1)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(len(stats['wait']), 1)
+        self.assertGreaterEqual(stats['wait'][0], 0)
+
+    @override_settings(JOBS_KEEP_DONE=60)
+    def test_purge(self):
+        record.delay('пост')
+        jobs.run(jobs.claim())
+        self.assertEqual(jobs.purge(), 0)
+        Job.objects.update(finished=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(jobs.purge(), 1)
+
+
+class PasswordResetMailTests(TestCase):
+    def test_mail_sent_by_worker(self):
+        """Запрос сброса пароля только ставит письмо в очередь."""
+        User.objects.create_user(
+            username='auth', email='auth@example.com', password='secret'
+        )
+        response = Client().post(
+            reverse('users:password_reset_form'),
+            {'email': 'auth@example.com'},
+        )
+        self.assertRedirects(response, reverse('password_reset_done'))
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Job.objects.get().name, 'core.mail.send_mail')
+        jobs.Worker().run_pending()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
+        self.assertIn('/auth/reset/', mail.outbox[0].body)
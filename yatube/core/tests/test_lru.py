@@ -0,0 +1,52 @@
+from django.test import SimpleTestCase
+
+from ..lru import LRUCache
+
+
+class LRUCacheTests(SimpleTestCase):
+    def make_cache(self, maxsize=2, timeout=60):
+        return LRUCache(lambda: maxsize, lambda: timeout)
+
+    def test_hits_and_misses(self):
+        lru = self.make_cache()
+        loads = []
+        for _ in range(3):
+            lru.get('a', lambda: loads.append('a') or 'A')
+        self.assertEqual(loads, ['a'])
+        self.assertEqual(lru.stats(), {'size': 1, 'hits': 2, 'misses': 1})
+
+    def test_least_recently_used_evicted(self):
+        lru = self.make_cache(maxsize=2)
+        lru.get('a', lambda: 'A')
+        lru.get('b', lambda: 'B')
+        lru.get('a', lambda: 'A')
+        lru.get('c', lambda: 'C')
+        self.assertEqual(list(lru.entries), ['a', 'c'])
+
+    def test_expired(self):
+        lru = self.make_cache(timeout=0)
+        lru.get('a', lambda: 'A')
+        self.assertEqual(lru.get('a', lambda: 'новое'), 'новое')
+        self.assertEqual(lru.misses, 2)
+
+    def test_failed_load_not_stored(self):
+        lru = self.make_cache()
+
+        def missing():
+            raise LookupError
+
+        with self.assertRaises(LookupError):
+            lru.get('a', missing)
+        self.assertEqual(lru.stats()['size'], 0)
+
+    def test_disabled(self):
+        lru = self.make_cache(maxsize=0)
+        lru.get('a', lambda: 'A')
+        self.assertEqual(lru.stats()['size'], 0)
+
+    def test_discard(self):
+        lru = self.make_cache()
+        lru.get('a', lambda: 'A')
+        lru.get('b', lambda: 'B')
+        lru.discard(lambda value: value == 'A')
+        self.assertEqual(list(lru.entries), ['b'])
@@ -0,0 +1,128 @@
+import gzip
+import json
+import zlib
+from unittest import mock
+
+from django.core.cache import caches
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+
+from .. import middleware
+from ..compression import brotli
+from ..middleware import CompressionMiddleware
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.guest_client = Client()
+
+    def test_server_timing_header(self):
+        """Ответ содержит замеры SQL, шаблонов и всего запроса."""
+        response = self.guest_client.get('/')
+        header = response['Server-Timing']
+        for metric in ('sql;dur=', 'queries', 'tpl;dur=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+
+    def test_structured_log(self):
+        """Замеры пишутся в лог строкой JSON."""
+        with self.assertLogs('yatube.performance', 'INFO') as logs:
+            self.guest_client.get('/about/author/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'about:author')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['template_ms'], 0)
+
+    def test_no_log_payload_when_disabled(self):
+        """При уровне логгера выше INFO строка JSON не собирается."""
+        with mock.patch.object(middleware, 'json') as json_module:
+            response = self.guest_client.get('/')
+        self.assertTrue(response.has_header('Server-Timing'))
+        json_module.dumps.assert_not_called()
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        """Запросы вне выборки не замеряются."""
+        response = self.guest_client.get('/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    text = 'Повторяющаяся разметка поста. ' * 100
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get(self, response, accept='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(
+            self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        )
+
+    def test_gzip(self):
+        response = self.get(HttpResponse(self.text))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(
+            gzip.decompress(response.content).decode(), self.text
+        )
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+
+    def test_brotli_preferred(self):
+        if brotli is None:
+            self.skipTest('Пакет brotli не установлен.')
+        response = self.get(HttpResponse(self.text), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            brotli.decompress(response.content).decode(), self.text
+        )
+
+    def test_skipped_responses(self):
+        """Без поддержки клиента, для коротких ответов и несжимаемых
+        типов тело отдаётся как есть."""
+        cases = (
+            ('без Accept-Encoding', HttpResponse(self.text), ''),
+            ('короткий ответ', HttpResponse('Коротко'), 'gzip'),
+            ('картинка', HttpResponse(
+                b'\x89PNG' * 500, content_type='image/png'
+            ), 'gzip'),
+        )
+        for name, original, accept in cases:
+            with self.subTest(name):
+                content = original.content
+                response = self.get(original, accept)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.content, content)
+
+    @override_settings(COMPRESSION_GZIP_LEVEL=1)
+    def test_level_setting(self):
+        fast = self.get(HttpResponse(self.text)).content
+        with self.settings(COMPRESSION_GZIP_LEVEL=9):
+            best = self.get(HttpResponse(self.text)).content
+        self.assertLessEqual(len(best), len(fast))
+
+    def test_streaming(self):
+        """Потоковый ответ сжимается по кускам: каждый кусок
+        распаковывается, не дожидаясь конца ответа."""
+        chunks = [f'{{"id": {i}}}\n' for i in range(1000)]
+        response = self.get(StreamingHttpResponse(
+            iter(chunks), content_type='application/x-ndjson'
+        ))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), 1)
+        first = zlib.decompressobj(31).decompress(parts[0]).decode()
+        self.assertEqual(first, chunks[0])
+        self.assertEqual(
+            gzip.decompress(b''.join(parts)).decode(), ''.join(chunks)
+        )
+
+    def test_strong_etag_weakened(self):
+        original = HttpResponse(self.text)
+        original['ETag'] = '"abc"'
+        self.assertEqual(self.get(original)['ETag'], 'W/"abc"')
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..page_cache import cache_anonymous_page
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.author = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(author=self.author, text='Первый')
+        self.guest_client = Client()
+        self.url = reverse('posts:main_page')
+
+    def test_warm_index_without_queries(self):
+        first = self.guest_client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertIsNone(second.context, 'Страница отрисована заново.')
+
+    def test_post_changes_invalidate(self):
+        self.guest_client.get(self.url)
+        Post.objects.create(author=self.author, text='Свежий пост')
+        self.assertContains(self.guest_client.get(self.url), 'Свежий пост')
+
+    def test_username_change_invalidates(self):
+        self.guest_client.get(self.url)
+        self.author.username = 'renamed'
+        self.author.save()
+        self.assertContains(self.guest_client.get(self.url), 'renamed')
+
+    def test_bypass(self):
+        """Вошедшему и посетителю с cookie CSRF страница рисуется
+        каждый раз."""
+        self.guest_client.get(self.url)
+        logged_in = Client()
+        logged_in.force_login(self.author)
+        with_csrf = Client()
+        with_csrf.cookies['csrftoken'] = 'x' * 64
+        for name, client in (('вошедший', logged_in), ('CSRF', with_csrf)):
+            with self.subTest(name):
+                response = client.get(self.url)
+                self.assertIsNotNone(response.context)
+
+    def test_key_includes_query(self):
+        self.guest_client.get(self.url)
+        response = self.guest_client.get(self.url, {'page': 2})
+        self.assertIsNotNone(response.context)
+
+    def test_about_pages(self):
+        url = reverse('about:author')
+        self.guest_client.get(url)
+        self.assertIsNone(self.guest_client.get(url).context)
+
+    def test_page_with_csrf_token_not_stored(self):
+        calls = []
+
+        @cache_anonymous_page()
+        def form_view(request):
+            calls.append(request)
+            return HttpResponse(get_token(request))
+
+        factory = RequestFactory()
+        form_view(factory.get('/form/'))
+        form_view(factory.get('/form/'))
+        self.assertEqual(len(calls), 2)
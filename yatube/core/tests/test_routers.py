@@ -0,0 +1,118 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from .. import routers
+from ..middleware import ReplicaPinningMiddleware
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.PrimaryReplicaRouter()
+        _, token = routers.start()
+        self.addCleanup(routers.stop, token)
+
+    def test_reads_go_to_replicas(self):
+        """Чтение - с реплик, запись - в основную БД."""
+        self.assertIn(
+            self.router.db_for_read(Post), ('replica1', 'replica2')
+        )
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_reads_after_write_go_to_primary(self):
+        """После записи запрос читает только из основной БД."""
+        def execute(sql, params, many, context):
+            pass
+
+        routers.record_writes(execute, 'SELECT 1', (), False, {})
+        self.assertNotEqual(self.router.db_for_read(Post), 'default')
+        routers.record_writes(
+            execute, 'UPDATE posts_post SET text = %s', ('',), False, {}
+        )
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_write_hint_does_not_pin(self):
+        """db_for_write Django зовёт и без записи, закрепления нет."""
+        self.router.db_for_write(Post)
+        self.assertNotEqual(self.router.db_for_read(Post), 'default')
+
+    def test_sessions_read_from_primary(self):
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaPinningMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = routers.PrimaryReplicaRouter()
+
+    def test_cookie_pins_reads(self):
+        """С cookie закрепления запрос читает из основной БД."""
+        def read_view(request):
+            return HttpResponse(self.router.db_for_read(Post))
+
+        self.factory.cookies[ReplicaPinningMiddleware.cookie_name] = '1'
+        response = ReplicaPinningMiddleware(read_view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'default')
+
+    def test_reader_stays_on_replicas(self):
+        """Без записей cookie не ставится и чтение идёт с реплик."""
+        def read_view(request):
+            return HttpResponse(self.router.db_for_read(Post))
+
+        response = ReplicaPinningMiddleware(read_view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica1')
+        self.assertFalse(response.cookies)
+
+
+# В тестах других БД нет: "репликой" служит основная, но маршрутизация
+# и закрепление работают как с настоящими репликами.
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaPinningViewsTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(author=self.author, group=self.group, text='Пост')
+        caches['default'].clear()
+
+    def test_guest_feeds_not_pinned(self):
+        """Чтение лент гостем не закрепляет его за основной БД."""
+        for url in (
+            reverse('posts:main_page'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:index_rss'),
+        ):
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.cookies)
+
+    def test_write_pins_visitor(self):
+        """Создавший пост получает cookie закрепления."""
+        client = Client()
+        client.force_login(self.author)
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertIn(ReplicaPinningMiddleware.cookie_name, response.cookies)
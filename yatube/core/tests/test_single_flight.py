@@ -0,0 +1,144 @@
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, connections
+from django.test import (
+    Client, SimpleTestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Post
+
+from .. import single_flight
+
+User = get_user_model()
+
+THREADS = 16
+
+
+def run_concurrently(func, threads=THREADS):
+    """Запускает func в потоках одновременно, возвращает результаты."""
+    barrier = threading.Barrier(threads)
+    results = [None] * threads
+
+    def target(number):
+        barrier.wait()
+        try:
+            results[number] = func()
+        finally:
+            connections.close_all()
+
+    workers = [
+        threading.Thread(target=target, args=(number,))
+        for number in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+        self.builds = []
+
+    def build(self, value='новая', delay=0.2):
+        def build():
+            self.builds.append(value)
+            time.sleep(delay)
+            return value
+        return build
+
+    def fetch(self, version, build):
+        return single_flight.fetch(self.cache, 'key', version, build, 60)
+
+    def test_cold_miss_built_once(self):
+        """Без копии в кеше остальные запросы ждут сборки."""
+        entries = run_concurrently(lambda: self.fetch('v1', self.build()))
+        self.assertEqual(self.builds, ['новая'])
+        self.assertEqual({entry.value for entry in entries}, {'новая'})
+
+    def test_stale_while_revalidate(self):
+        self.fetch('v1', self.build('старая', delay=0))
+        self.builds.clear()
+        started = time.monotonic()
+        entries = run_concurrently(lambda: self.fetch('v2', self.build()))
+        self.assertEqual(self.builds, ['новая'])
+        stale = [entry for entry in entries if entry.version == 'v1']
+        self.assertEqual(len(stale), THREADS - 1)
+        self.assertEqual({entry.value for entry in stale}, {'старая'})
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(self.fetch('v2', self.build()).value, 'новая')
+
+    def test_failed_build_releases_lock(self):
+        def broken():
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            self.fetch('v1', broken)
+        self.assertEqual(
+            self.fetch('v1', self.build(delay=0)).value, 'новая'
+        )
+
+    @override_settings(SINGLE_FLIGHT_WAIT=5)
+    def test_uncacheable_not_awaited(self):
+        """Если кешировать нечего, ждущие запросы собирают сами
+        и не ждут SINGLE_FLIGHT_WAIT."""
+        started = time.monotonic()
+        entries = run_concurrently(
+            lambda: self.fetch('v1', self.build(None, delay=0.1)), threads=4
+        )
+        self.assertEqual({entry.value for entry in entries}, {None})
+        self.assertLess(time.monotonic() - started, 2)
+
+
+class PageRebuildLoadTests(TransactionTestCase):
+    """Нагрузочный тест: после нового поста одновременные гости
+    главной вызывают одну перестройку страницы."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.author = User.objects.create_user(username='auth')
+        for number in range(15):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        self.url = reverse('posts:main_page')
+        self.lock = threading.Lock()
+        self.queries = 0
+
+    def count(self, execute, sql, params, many, context):
+        with self.lock:
+            self.queries += 1
+        return execute(sql, params, many, context)
+
+    def get(self):
+        with connection.execute_wrapper(self.count):
+            return Client().get(self.url)
+
+    def test_queries_per_rebuild(self):
+        self.get()
+        Post.objects.create(author=self.author, text='Первая правка')
+        self.queries = 0
+        self.get()
+        per_rebuild = self.queries
+        self.assertGreater(per_rebuild, 0)
+
+        Post.objects.create(author=self.author, text='Вторая правка')
+        self.queries = 0
+        responses = run_concurrently(self.get)
+        self.assertEqual(self.queries, per_rebuild)
+        # Пока страница перестраивалась, остальные получили прежнюю
+        # копию с прежним ETag.
+        etags = {True: set(), False: set()}
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            fresh = 'Вторая правка' in response.content.decode()
+            etags[fresh].add(response['ETag'])
+        self.assertEqual(len(etags[True]), 1)
+        self.assertLessEqual(len(etags[False]), 1)
+        self.assertFalse(etags[True] & etags[False])
+        self.assertContains(self.get(), 'Вторая правка')
@@ -0,0 +1,107 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..compression import accepted_encodings, brotli
+from ..middleware import PrecompressedStaticMiddleware
+
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    DEBUG=False,
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE='core.storage.CompressedManifestStaticFilesStorage',
+    SERVE_STATIC=True,
+)
+class PrecompressedStaticTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.css = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        self.middleware = PrecompressedStaticMiddleware(
+            lambda request: HttpResponse('view')
+        )
+
+    def get(self, path, **headers):
+        return self.middleware(self.factory.get(path, **headers))
+
+    def test_collectstatic_writes_compressed_copies(self):
+        """Файлы с хешем в имени получают сжатые копии, а уже сжатые
+        картинки - нет."""
+        path = os.path.join(STATIC_ROOT, self.css)
+        with open(path, 'rb') as css, gzip.open(path + '.gz') as copy:
+            self.assertEqual(copy.read(), css.read())
+        self.assertEqual(os.path.exists(path + '.br'), brotli is not None)
+        logo = staticfiles_storage.stored_name('img/logo.png')
+        self.assertFalse(
+            os.path.exists(os.path.join(STATIC_ROOT, logo + '.gz'))
+        )
+
+    def test_serves_precompressed_copy(self):
+        encodings = (('gzip', 'gzip'), ('', None), ('gzip;q=0', None))
+        if brotli is not None:
+            encodings += (('gzip, br', 'br'),)
+        for header, encoding in encodings:
+            with self.subTest(header=header):
+                response = self.get(
+                    '/static/' + self.css, HTTP_ACCEPT_ENCODING=header
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+                self.assertIn('immutable', response['Cache-Control'])
+
+    def test_unhashed_name_is_not_immutable(self):
+        response = self.get('/static/css/bootstrap.min.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_not_modified(self):
+        response = self.get('/static/' + self.css)
+        response = self.get(
+            '/static/' + self.css,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_requests_pass_through(self):
+        for path in ('/', '/static/missing.css', '/static/../manage.py'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).content, b'view')
+
+    def test_pages_reference_collected_files(self):
+        """С хешированным хранилищем страница находит все свои файлы,
+        включая иконку."""
+        caches['default'].clear()
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, staticfiles_storage.stored_name('img/fav/favicon.ico')
+        )
+
+
+class AcceptedEncodingsTests(TestCase):
+    def test_parse(self):
+        self.assertEqual(
+            accepted_encodings('gzip, deflate;q=0.5, br;q=0, identity'),
+            {'gzip', 'deflate', 'identity'},
+        )
+        self.assertEqual(accepted_encodings(''), set())
@@ -1,14 +1,176 @@
+import datetime
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Max, Min
+from django.forms.utils import flatatt
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.html import format_html, format_html_join
+
+from . import cache, search
+from .models import Post, PostQuerySet, Group, total_posts_count
+
+
+class AdminPostQuerySet(PostQuerySet):
+    """Посты списка в админке: переход по датам без полных проходов
+    таблицы. Менеджер Post.objects эти методы не меняют."""
+
+    def aggregate(self, *args, **kwargs):
+        """SQLite берёт MIN и MAX из индекса, только когда агрегат
+        в запросе один. Несколько MIN и MAX (переход по датам) считаем
+        отдельными запросами вместо прохода по всему индексу."""
+        if args or len(kwargs) < 2 or not all(
+            isinstance(value, (Min, Max)) for value in kwargs.values()
+        ):
+            return super().aggregate(*args, **kwargs)
+        result = {}
+        for alias, value in kwargs.items():
+            result.update(super().aggregate(**{alias: value}))
+        return result
+
+    def dates(self, field_name, kind, order='ASC'):
+        """Различные даты публикации прыжками по индексу pub_date.
+
+        Вместо усечения даты в каждой строке (полный проход таблицы)
+        делает по одному запросу MIN(pub_date) на каждую найденную дату.
+        Возвращает список, а не QuerySet; так даты читает переход
+        по датам.
+        """
+        if field_name != 'pub_date' or kind not in ('year', 'month', 'day'):
+            return super().dates(field_name, kind, order)
+        queryset = self.order_by()
+        found = []
+        while True:
+            first = queryset.aggregate(first=Min('pub_date'))['first']
+            if first is None:
+                break
+            if settings.USE_TZ:
+                first = timezone.localtime(first)
+            start = truncate_date(first.date(), kind)
+            found.append(start)
+            boundary = datetime.datetime.combine(
+                next_period(start, kind), datetime.time.min
+            )
+            if settings.USE_TZ:
+                boundary = timezone.make_aware(boundary)
+            queryset = self.order_by().filter(pub_date__gte=boundary)
+        return found if order == 'ASC' else found[::-1]
+
+
+def truncate_date(date, kind):
+    if kind == 'year':
+        return date.replace(month=1, day=1)
+    if kind == 'month':
+        return date.replace(day=1)
+    return date
+
+
+def next_period(date, kind):
+    if kind == 'year':
+        return date.replace(year=date.year + 1)
+    if kind == 'month':
+        return date.replace(
+            year=date.year + date.month // 12, month=date.month % 12 + 1
+        )
+    return date + datetime.timedelta(days=1)
+
 
-from .models import Post, Group
+class PostCountersPaginator(Paginator):
+    """Для нефильтрованного списка берёт число постов из счётчиков
+    авторов вместо COUNT(*) по всей таблице постов.
+
+    Страницу выбирает в два шага: сначала ключи постов, чтобы OFFSET
+    шёл по индексу без соединений с авторами и группами, затем сами
+    посты по ключам.
+    """
+
+    def page(self, number):
+        page = super().page(number)
+        ids = list(page.object_list.values_list('pk', flat=True))
+        page.object_list = self.object_list.filter(pk__in=ids)
+        return page
+
+    @cached_property
+    def count(self):
+        if self.object_list.query.where:
+            return super().count
+        return total_posts_count()
+
+
+def group_choices():
+    """Группы для выпадающих списков: между запросами хранятся в кеше,
+    пока не изменится какая-нибудь группа."""
+    key = f'admin-group-choices:{cache.feed_version(cache.SITE)}'
+    choices = cache.feed_cache().get(key)
+    if choices is None:
+        choices = list(Group.objects.values_list('pk', 'title'))
+        cache.feed_cache().set(key, choices, settings.FEED_CACHE_TIMEOUT)
+    return choices
+
+
+class PlainSelect(forms.Select):
+    """Select, собирающий варианты без шаблона на каждый из них.
+
+    В list_editable выпадающий список повторяется в каждой строке,
+    и отрисовка шаблонов вариантов занимает почти всё время страницы.
+    """
+
+    def render(self, name, value, attrs=None, renderer=None):
+        widget = self.get_context(name, value, attrs)['widget']
+        options = format_html_join('', '<option value="{}"{}>{}</option>', (
+            (option['value'], flatatt({'selected': option['selected']}),
+             option['label'])
+            for _, group, _ in widget['optgroups'] for option in group
+        ))
+        return format_html(
+            '<select name="{}"{}>{}</select>',
+            widget['name'], flatatt(widget['attrs']), options,
+        )
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    paginator = PostCountersPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return AdminPostQuerySet(
+            model=self.model, query=queryset.query, using=queryset._db
+        )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            kwargs['widget'] = PlainSelect
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if db_field.name == 'group':
+            # Готовый список вместо queryset: иначе каждая строка
+            # list_editable заново выбирает все группы.
+            formfield.choices = [
+                ('', formfield.empty_label)
+            ] + group_choices()
+        return formfield
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск через FTS5 вместо LIKE '%...%' по всей таблице.
+        if not search.match_expression(search_term) or (
+            not search.is_available()
+        ):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return search.filter_queryset(queryset, search_term), False
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,164 @@
+"""Версии лент для кеширования отрисованных списков постов.
+
+У каждой ленты (главная, группа, автор) есть номер версии в кеше.
+Версия входит в ключ кешированного фрагмента, поэтому после изменения
+поста достаточно увеличить версии затронутых лент: старые фрагменты
+просто перестают запрашиваться и вытесняются по таймауту.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import routers
+
+from .models import Group, Post, posts_bulk_created, username_changed
+
+User = get_user_model()
+
+INDEX = 'index'
+GROUP = 'group'
+AUTHOR = 'author'
+# Версия всего сайта: меняется при редких правках групп, которые
+# видны на всех лентах (ссылки на группы).
+SITE = 'site'
+
+
+def feed_cache():
+    return caches[settings.FEED_CACHE_ALIAS]
+
+
+def version_key(scope, pk=None):
+    return f'feed-version:{scope}:{pk}'
+
+
+def initial_version():
+    # Версия с нуля могла бы совпасть с версией вытесненного ключа,
+    # и тогда отдался бы старый фрагмент; время такого не допускает.
+    return time.time_ns()
+
+
+def feed_version(scope, pk=None):
+    """Составная версия ленты: версия сайта и версия самой ленты."""
+    cache = feed_cache()
+    keys = [version_key(SITE), version_key(scope, pk)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, initial_version(), None)
+            versions[key] = cache.get(key)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def bump_version(scope, pk=None):
+    cache = feed_cache()
+    key = version_key(scope, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, initial_version(), None)
+    if settings.DATABASE_REPLICAS:
+        cache.set(changed_key(scope, pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def changed_key(scope, pk=None):
+    return f'feed-changed:{scope}:{pk}'
+
+
+def replicas_may_lag(scope, pk=None):
+    """Лента только что изменилась, а запрос читает с реплик, которые
+    могут ещё не видеть изменения. Отрисованное по такому запросу нельзя
+    кешировать под новой версией: устаревшие данные жили бы до её
+    следующей смены."""
+    if not settings.DATABASE_REPLICAS or routers.is_pinned():
+        return False
+    return bool(feed_cache().get_many(
+        [changed_key(SITE), changed_key(scope, pk)]
+    ))
+
+
+def feed_cache_timeout(scope, pk=None):
+    if replicas_may_lag(scope, pk):
+        return 0
+    return settings.FEED_CACHE_TIMEOUT
+
+
+def feed_cache_key(request, page_obj, scope, pk=None):
+    """Ключ фрагмента со списком постов: лента, её версия и страница."""
+    if getattr(page_obj, 'is_cursor', False):
+        page = 'cursor:' + request.GET.get('cursor', '')
+    else:
+        page = f'page:{page_obj.number}'
+    return f'{scope}:{pk}:{feed_version(scope, pk)}:{page}'
+
+
+def viewer_tag(request):
+    """Метка посетителя для ETag: страница зависит от пользователя,
+    а хеш cookie сессии получается без запросов к БД."""
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return 'anonymous'
+    return hashlib.sha256(session_key.encode()).hexdigest()[:16]
+
+
+def feed_etag(request, scope, pk=None):
+    """Слабый ETag ленты: меняется вместе с её версией."""
+    if replicas_may_lag(scope, pk):
+        return None
+    return f'W/"{feed_version(scope, pk)}.{viewer_tag(request)}"'
+
+
+def bump_post_versions(post, previous=None):
+    bump_version(INDEX)
+    bump_version(AUTHOR, post.author_id)
+    if post.group_id is not None:
+        bump_version(GROUP, post.group_id)
+    if previous is not None:
+        if previous['author_id'] != post.author_id:
+            bump_version(AUTHOR, previous['author_id'])
+        if previous['group_id'] not in (None, post.group_id):
+            bump_version(GROUP, previous['group_id'])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    bump_post_versions(instance, instance._previous_state)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_post_versions(instance)
+
+
+@receiver(posts_bulk_created, sender=Post)
+def posts_bulk_saved(sender, posts, **kwargs):
+    bump_version(INDEX)
+    for author_id in {post.author_id for post in posts}:
+        bump_version(AUTHOR, author_id)
+    for group_id in {post.group_id for post in posts} - {None}:
+        bump_version(GROUP, group_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_version(SITE)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, update_fields, **kwargs):
+    # Вход на сайт сохраняет только last_login, страниц это не меняет.
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        bump_version(AUTHOR, instance.pk)
+    if username_changed(instance):
+        # Имя автора выводится в ленте главной и его групп.
+        bump_version(INDEX)
+        groups = Post.objects.filter(author_id=instance.pk).exclude(
+            group=None
+        ).order_by().values_list('group_id', flat=True).distinct()
+        for group_id in groups:
+            bump_version(GROUP, group_id)
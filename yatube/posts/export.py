@@ -0,0 +1,91 @@
+"""Потоковая выгрузка постов в NDJSON и JSON.
+
+Посты читаются из БД пачками через iterator(), а ответ отдаётся по мере
+чтения, поэтому память процесса не зависит от числа постов.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Post
+
+NDJSON = 'ndjson'
+JSON = 'json'
+CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson; charset=utf-8',
+    JSON: 'application/json; charset=utf-8',
+}
+FIELDS = ('id', 'text', 'pub_date', 'author__username', 'group__slug')
+NAMES = ('id', 'text', 'pub_date', 'author', 'group')
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def parse_moment(value, end_of_day=False):
+    """Момент времени из параметра запроса: дата со временем или дата.
+    Дата в конце диапазона означает конец этого дня."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            date = parse_date(value)
+            if date is None:
+                raise ValueError(value)
+            if end_of_day:
+                date += datetime.timedelta(days=1)
+            moment = datetime.datetime.combine(date, datetime.time())
+            if end_of_day:
+                moment -= datetime.timedelta(microseconds=1)
+    except ValueError:
+        raise InvalidFilter(f'Неверная дата: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_posts(author=None, group=None, since=None, until=None):
+    """Посты для выгрузки в порядке публикации.
+
+    Сортировка (pub_date, id) берётся из индексов лент, так что SQLite
+    не сортирует выборку во временном B-дереве.
+    """
+    posts = Post.objects.order_by('pub_date', 'id')
+    if author is not None:
+        posts = posts.filter(author=author)
+    if group is not None:
+        posts = posts.filter(group=group)
+    if since:
+        posts = posts.filter(pub_date__gte=parse_moment(since))
+    if until:
+        posts = posts.filter(
+            pub_date__lte=parse_moment(until, end_of_day=True)
+        )
+    return posts.values_list(*FIELDS)
+
+
+def stream(posts, export_format=NDJSON, chunk_size=None):
+    """Части ответа: по строке NDJSON (или элементу массива JSON)
+    на пост, склеенные в куски по chunk_size постов."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    encode = DjangoJSONEncoder(ensure_ascii=False).encode
+    if export_format == JSON:
+        yield '['
+    separator = ''
+    lines = []
+    for row in posts.iterator(chunk_size=chunk_size):
+        line = encode(dict(zip(NAMES, row)))
+        if export_format == NDJSON:
+            lines.append(line + '\n')
+        else:
+            lines.append(separator + line)
+            separator = ','
+        if len(lines) == chunk_size:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+    if export_format == JSON:
+        yield ']'
@@ -0,0 +1,157 @@
+"""Синхронизация таблицы ленты FeedEntry с постами.
+
+Одиночные правки приходят через сигналы моделей. Массовые вставки и
+перестройка заполняют таблицу одним INSERT ... SELECT, без загрузки
+постов в Python.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    FeedEntry, Group, Post, posts_bulk_created, username_changed,
+)
+
+User = get_user_model()
+
+# SQLite ограничивает число параметров в одном запросе.
+IDS_PER_QUERY = 500
+
+
+def entry_fields(post):
+    group = post.group
+    return {
+        'pub_date': post.pub_date,
+        'author_id': post.author_id,
+        'author_username': post.author.username,
+        'group_id': post.group_id,
+        'group_slug': group.slug if group else '',
+        'group_title': group.title if group else '',
+        'text': post.text[:FeedEntry.EXCERPT_LENGTH],
+        'text_truncated': len(post.text) > FeedEntry.EXCERPT_LENGTH,
+        'image': post.image.name or '',
+        'thumbnails_ready': post.thumbnails_ready,
+    }
+
+
+def fill_missing(where='1 = 1', params=(), using=connection):
+    """Добавляет строки ленты для постов, у которых их нет.
+
+    where - условие на посты (псевдоним таблицы p). Возвращает число
+    добавленных строк.
+    """
+    quote = using.ops.quote_name
+    sql = f"""
+        INSERT INTO {quote(FeedEntry._meta.db_table)} (
+            post_id, pub_date, author_id, author_username,
+            group_id, group_slug, group_title, text, text_truncated,
+            image, thumbnails_ready
+        )
+        SELECT
+            p.id, p.pub_date, p.author_id, u.username,
+            p.group_id, COALESCE(g.slug, ''), COALESCE(g.title, ''),
+            SUBSTR(p.text, 1, %s), LENGTH(p.text) > %s,
+            p.image, p.thumbnails_ready
+        FROM {quote(Post._meta.db_table)} p
+        INNER JOIN {quote(User._meta.db_table)} u ON u.id = p.author_id
+        LEFT JOIN {quote(Group._meta.db_table)} g ON g.id = p.group_id
+        WHERE {where} AND NOT EXISTS (
+            SELECT 1 FROM {quote(FeedEntry._meta.db_table)} e
+            WHERE e.post_id = p.id
+        )
+    """
+    length = FeedEntry.EXCERPT_LENGTH
+    with using.cursor() as cursor:
+        cursor.execute(sql, [length, length, *params])
+        return cursor.rowcount
+
+
+class FeedPosts:
+    """Строки ленты страницы, превращённые в посты для шаблонов.
+
+    Превращение ленивое: если список постов взят из кеша фрагментов,
+    запрос к таблице ленты не выполняется.
+    """
+
+    def __init__(self, entries, group=None):
+        self.entries = entries
+        self.group = group
+        self._posts = None
+
+    @property
+    def posts(self):
+        if self._posts is None:
+            self._posts = [
+                entry.as_post(self.group) for entry in self.entries
+            ]
+        return self._posts
+
+    def __iter__(self):
+        return iter(self.posts)
+
+    def __len__(self):
+        return len(self.posts)
+
+    def __getitem__(self, index):
+        return self.posts[index]
+
+
+def as_posts(page_obj, group=None):
+    page_obj.object_list = FeedPosts(page_obj.object_list, group)
+    return page_obj
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    fields = entry_fields(instance)
+    if created or not FeedEntry.objects.filter(
+        post_id=instance.pk
+    ).update(**fields):
+        FeedEntry.objects.create(post_id=instance.pk, **fields)
+
+
+@receiver(posts_bulk_created, sender=Post)
+def posts_bulk_saved(sender, posts, **kwargs):
+    ids = [post.pk for post in posts if post.pk is not None]
+    if len(ids) < len(posts):
+        # SQLite не возвращает ключи из bulk_create. Ключи AUTOINCREMENT
+        # не переиспользуются, так что новые посты - после последнего
+        # поста в ленте.
+        last = FeedEntry.objects.order_by('-post_id').values_list(
+            'post_id', flat=True
+        ).first()
+        fill_missing('p.id > %s', [last or 0])
+    for start in range(0, len(ids), IDS_PER_QUERY):
+        chunk = ids[start:start + IDS_PER_QUERY]
+        fill_missing(
+            'p.id IN ({})'.format(', '.join(['%s'] * len(chunk))), chunk
+        )
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, **kwargs):
+    # Сохранения без смены имени (пароль, правки в админке) ленту
+    # не трогают.
+    if not created and username_changed(instance):
+        FeedEntry.objects.filter(author_id=instance.pk).update(
+            author_username=instance.username
+        )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        FeedEntry.objects.filter(group_id=instance.pk).update(
+            group_slug=instance.slug, group_title=instance.title
+        )
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    # Посты получают group=NULL через UPDATE, без сигналов post_save.
+    FeedEntry.objects.filter(group_id=instance.pk).update(
+        group_id=None, group_slug='', group_title=''
+    )
@@ -0,0 +1,110 @@
+"""Группы по slug и авторы по username из LRU-кеша процесса.
+
+Эти объекты загружают страницы групп и профилей, их ETag и RSS/Atom.
+Вместе с ними кешируются счётчики постов, по которым считаются
+страницы пагинатора. Объекты общие для всех запросов процесса:
+их нельзя менять.
+
+Сигналы сбрасывают кеш только в процессе, где было изменение. Чтобы
+остальные процессы не отрисовали страницу новой версии по устаревшему
+объекту и не положили её в общий кеш, рядом с объектом хранится версия
+его ленты из posts.cache. Её меняют и правки самого объекта, и его
+посты; если версия в общем кеше другая, объект загружается заново.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.shortcuts import get_object_or_404
+
+from core.lru import LRUCache
+
+from . import cache
+from .models import Group
+
+User = get_user_model()
+
+
+def cache_size():
+    return settings.LOOKUP_CACHE_SIZE
+
+
+def cache_timeout():
+    return settings.LOOKUP_CACHE_TIMEOUT
+
+
+groups = LRUCache(cache_size, cache_timeout)
+authors = LRUCache(cache_size, cache_timeout)
+
+
+def lookup(lru, key, scope, load):
+    """Объект из lru, если версия его ленты не изменилась."""
+    loaded = []
+
+    def load_versioned(pk=None):
+        # Версия читается до объекта: изменение между ними вызовет
+        # лишнюю загрузку, а не устаревший объект под новой версией.
+        # При первом поиске по slug или username ключ объекта ещё
+        # неизвестен: объект загружается, чтобы узнать ключ, и после
+        # чтения версии - ещё раз.
+        if pk is None:
+            pk = load().pk
+        version = current_version(scope, pk)
+        instance = load()
+        loaded.append(instance)
+        if instance.pk != pk:
+            # slug или username успели перейти к другому объекту.
+            version = None
+        return instance, version
+
+    instance, version = lru.get(key, load_versioned)
+    if not loaded and (
+        version is None or version != cache.feed_version(scope, instance.pk)
+    ):
+        lru.delete(key)
+        instance, _ = lru.get(key, lambda: load_versioned(instance.pk))
+    return instance
+
+
+def current_version(scope, pk):
+    # Пока реплики могут отставать, загруженный объект не закрепляется
+    # за версией и проверяется на следующем запросе снова.
+    if cache.replicas_may_lag(scope, pk):
+        return None
+    return cache.feed_version(scope, pk)
+
+
+def group_by_slug(slug):
+    return lookup(
+        groups, slug, cache.GROUP,
+        lambda: get_object_or_404(Group, slug=slug),
+    )
+
+
+def author_by_username(username):
+    return lookup(
+        authors, username, cache.AUTHOR,
+        lambda: get_object_or_404(
+            User.objects.select_related('stats'), username=username
+        ),
+    )
+
+
+# Объекты ищутся и по ключу, и по slug или username: новый объект
+# мог занять slug, под которым в кеше лежит прежний.
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_group(sender, instance, **kwargs):
+    groups.discard(
+        lambda entry: entry[0].pk == instance.pk
+        or entry[0].slug == instance.slug
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_author(sender, instance, **kwargs):
+    authors.discard(
+        lambda entry: entry[0].pk == instance.pk
+        or entry[0].username == instance.username
+    )
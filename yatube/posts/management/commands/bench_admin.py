@@ -0,0 +1,74 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from core.bench import bench_database, measure, percentile, seed
+from posts.admin import PostAdmin
+from posts.models import Post
+
+User = get_user_model()
+
+
+class PlainPostAdmin(admin.ModelAdmin):
+    """Настройки списка постов до оптимизаций, для сравнения."""
+    list_display = PostAdmin.list_display
+    list_editable = PostAdmin.list_editable
+    search_fields = PostAdmin.search_fields
+    list_filter = PostAdmin.list_filter
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет отрисовку списка постов в админке на большой таблице: '
+        'текущий PostAdmin и настройки по умолчанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with bench_database():
+            self.stdout.write(f'Создаём {options["posts"]} постов...')
+            seed(users=1000, groups=50, posts=options['posts'])
+            superuser = User.objects.create_superuser(
+                username='bench_admin', email='admin@example.com',
+                password='bench',
+            )
+            year = Post.objects.values_list('pub_date', flat=True)[0].year
+            middle_page = options['posts'] // PostAdmin.list_per_page // 2
+            cases = (
+                ('первая страница', {}),
+                (f'страница {middle_page}', {'p': middle_page - 1}),
+                ('год', {'pub_date__year': year}),
+                ('поиск', {'q': '4242'}),
+            )
+            factory = RequestFactory()
+            for admin_class in (PlainPostAdmin, PostAdmin):
+                model_admin = admin_class(Post, admin.site)
+                for title, params in cases:
+                    request = factory.get('/admin/posts/post/', params)
+                    request.user = superuser
+
+                    def render_changelist():
+                        model_admin.changelist_view(request).render()
+
+                    # Журнал запросов ограничен 9000 записями и уже
+                    # заполнен при наполнении БД.
+                    connection.queries_log.clear()
+                    with CaptureQueriesContext(connection) as queries:
+                        render_changelist()
+                    timings = measure(render_changelist, options['repeat'])
+                    sql_time = sum(
+                        float(query['time']) for query in queries
+                    )
+                    self.stdout.write(
+                        f'{admin_class.__name__:<15} {title:<16}: '
+                        f'p50 {percentile(timings, 50) * 1000:9.2f} ms, '
+                        f'p95 {percentile(timings, 95) * 1000:9.2f} ms, '
+                        f'queries {len(queries):3}, '
+                        f'sql {sql_time * 1000:9.2f} ms'
+                    )
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core.bench import bench_database, measure, percentile, seed
+from posts import feed
+from posts.models import FeedEntry, Group, Post
+from posts.utils import CastomPaginator
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает выборку страницы ленты главной и группы: посты '
+        'с соединениями с авторами и группами против таблицы FeedEntry.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200000)
+        parser.add_argument('--page', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with bench_database():
+            self.stdout.write(f'Создаём {options["posts"]} постов...')
+            seed(users=1000, groups=10, posts=options['posts'])
+            group = Group.objects.first()
+            joined = Post.objects.select_related('author', 'group')
+            total = options['posts']
+            sources = (
+                ('index', 'join', joined, None, total),
+                ('index', 'feed', FeedEntry.objects.all(), None, total),
+                ('group', 'join', joined.filter(group=group), None,
+                 group.posts_count),
+                ('group', 'feed', FeedEntry.objects.filter(
+                    group_id=group.pk
+                ), group, group.posts_count),
+            )
+            factory = RequestFactory()
+            for page in (1, options['page']):
+                request = factory.get('/', {'page': page})
+                for name, source, queryset, page_group, count in sources:
+                    def render_page():
+                        page_obj = CastomPaginator(
+                            request, queryset, 'pages', count=count
+                        )
+                        if source == 'feed':
+                            feed.as_posts(page_obj, page_group)
+                        for post in page_obj:
+                            post.author.username, post.group.slug
+
+                    timings = measure(render_page, options['repeat'])
+                    self.stdout.write(
+                        f'{name:>5} {source:>4} page {page:>5}: '
+                        f'p50 {percentile(timings, 50) * 1000:.2f} ms, '
+                        f'p95 {percentile(timings, 95) * 1000:.2f} ms'
+                    )
+        self.stdout.write(
+            f'Страница - {settings.POSTS_ON_PAGE} постов; число постов '
+            'передано паджинатору, COUNT(*) не выполняется.'
+        )
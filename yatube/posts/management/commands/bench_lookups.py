@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from core.bench import bench_database, measure, percentile, seed
+from posts import lookups
+from posts.models import Group
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск групп по slug и авторов по username с LRU-кешем '
+        'posts.lookups и без него: время поиска, запросы к БД на страницах '
+        'group_list и profile, попадания и промахи кеша.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with bench_database():
+            seed(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+            )
+            slugs = list(Group.objects.values_list('slug', flat=True))
+            usernames = list(User.objects.values_list('username', flat=True))
+            urls = {
+                'group_list': reverse('posts:group_list', args=(slugs[0],)),
+                'profile': reverse('posts:profile', args=(usernames[0],)),
+            }
+            self.stdout.write(
+                f'{"кеш":<6} {"поиск":<7} {"p50, мкс":>9} '
+                f'{"страница":<11} {"запросов":>8} {"p50, мс":>8}'
+            )
+            for name, size in (('нет', 0), ('LRU', 1000)):
+                with override_settings(LOOKUP_CACHE_SIZE=size):
+                    self.compare(name, slugs, usernames, urls, options)
+            self.stdout.write(
+                f'Группы: {lookups.groups.stats()}, '
+                f'авторы: {lookups.authors.stats()}'
+            )
+
+    def compare(self, name, slugs, usernames, urls, options):
+        lookups.groups.clear()
+        lookups.authors.clear()
+        caches['default'].clear()
+        lookup_timings = {
+            'группа': self.lookup(lookups.group_by_slug, slugs, options),
+            'автор': self.lookup(
+                lookups.author_by_username, usernames, options
+            ),
+        }
+        client = Client()
+        for (kind, timings), (page, url) in zip(
+            lookup_timings.items(), urls.items()
+        ):
+            # Прогрев: кеш фрагментов ленты и LRU.
+            client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url)
+            count = len(queries)
+            page_timings = measure(lambda: client.get(url), options['repeat'])
+            self.stdout.write(
+                f'{name:<6} {kind:<7} '
+                f'{percentile(timings, 50) * 1e6:>9.1f} '
+                f'{page:<11} {count:>8} '
+                f'{percentile(page_timings, 50) * 1000:>8.2f}'
+            )
+
+    def lookup(self, find, keys, options):
+        for key in keys:
+            find(key)
+        timings = []
+        for key in keys:
+            timings += measure(
+                lambda: find(key), max(1, options['repeat'] // len(keys))
+            )
+        return timings
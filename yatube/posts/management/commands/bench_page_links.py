@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import Context, Template
+from django.template.loader import get_template
+
+from core.bench import measure, percentile
+from posts.utils import WindowedPaginator
+
+# Список страниц до свёртки: ссылка на каждую страницу.
+FULL_PAGE_LINKS = Template("""
+{% for i in page_obj.paginator.page_range %}
+  {% if page_obj.number == i %}
+    <li class="page-item active"><span class="page-link">{{ i }}</span></li>
+  {% else %}
+    <li class="page-item">
+      <a class="page-link" href="?page={{ i }}">{{ i }}</a>
+    </li>
+  {% endif %}
+{% endfor %}
+""")
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает размер и время отрисовки ссылок на страницы: полный '
+        'список страниц и свёрнутый (includes/paginator.html).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=500000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        # Ссылки зависят только от числа постов, БД для замера не нужна.
+        posts = range(options['posts'])
+        full = Paginator(posts, settings.POSTS_ON_PAGE)
+        windowed = WindowedPaginator(posts, settings.POSTS_ON_PAGE)
+        include = get_template('includes/paginator.html')
+        self.stdout.write(f'Страниц: {full.num_pages}')
+        for number in (1, full.num_pages // 2):
+            cases = (
+                ('все страницы', FULL_PAGE_LINKS, full.page(number)),
+                ('свёрнутые', include.template, windowed.page(number)),
+            )
+            for title, template, page_obj in cases:
+                html = template.render(Context({'page_obj': page_obj}))
+                timings = measure(
+                    lambda: template.render(Context({'page_obj': page_obj})),
+                    options['repeat'],
+                )
+                self.stdout.write(
+                    f'страница {number:>6}, {title:<13}: '
+                    f'{len(html.encode()):>9} байт, '
+                    f'p50 {percentile(timings, 50) * 1000:8.2f} ms'
+                )
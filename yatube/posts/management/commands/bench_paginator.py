@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from core.bench import bench_database, measure, percentile, seed
+from posts.models import Post
+from posts.utils import CURSOR_NEXT, CastomPaginator, encode_cursor
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время открытия первой и далёкой страницы ленты '
+        'в режимах пагинации pages и cursor.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        deep_page = options['page']
+        per_page = settings.POSTS_ON_PAGE
+        with bench_database():
+            self.stdout.write(f'Создаём {deep_page * per_page} постов...')
+            seed(users=100, groups=10, posts=deep_page * per_page)
+            factory = RequestFactory()
+            deep_post = Post.objects.order_by('-pub_date', '-pk')[
+                (deep_page - 1) * per_page - 1
+            ]
+            cursor = encode_cursor(
+                CURSOR_NEXT, deep_post.pub_date, deep_post.pk
+            )
+            cases = (
+                ('pages', 1, factory.get('/')),
+                ('pages', deep_page, factory.get('/', {'page': deep_page})),
+                ('cursor', 1, factory.get('/')),
+                ('cursor', deep_page, factory.get('/', {'cursor': cursor})),
+            )
+            for mode, page, request in cases:
+                def render_page():
+                    list(CastomPaginator(request, Post.objects.all(), mode))
+
+                with CaptureQueriesContext(connection) as queries:
+                    render_page()
+                timings = measure(render_page, options['repeat'])
+                self.stdout.write(
+                    f'{mode:>6} page {page:>6}: '
+                    f'p50 {percentile(timings, 50) * 1000:.2f} ms, '
+                    f'p95 {percentile(timings, 95) * 1000:.2f} ms, '
+                    f'queries {len(queries)}'
+                )
@@ -0,0 +1,84 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from PIL import Image
+
+from posts import thumbnails
+
+
+def make_image(width, height):
+    """Фото-подобная картинка JPEG: шум не даёт сжатию схитрить."""
+    image = Image.effect_noise((width, height), 64).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет, сколько картинок в секунду make_thumbnails переводит '
+        'в миниатюры всех размеров при 1, 2, 4 ... процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, default=64)
+        parser.add_argument('--width', type=int, default=2000)
+        parser.add_argument('--height', type=int, default=1500)
+        parser.add_argument(
+            '--max-workers', type=int, default=os.cpu_count()
+        )
+
+    def handle(self, *args, **options):
+        cores = os.cpu_count()
+        limit = options['max_workers']
+        counts = sorted({2 ** i for i in range(limit.bit_length())} | {limit})
+        media_root = tempfile.mkdtemp()
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                names = self.upload(options)
+                self.stdout.write(
+                    f'{options["images"]} картинок '
+                    f'{options["width"]}x{options["height"]}, '
+                    f'размеры: {", ".join(thumbnails.SIZES)}, ядер: {cores}'
+                )
+                self.stdout.write(
+                    f'{"процессов":>9} {"сек":>7} {"картинок/с":>11} '
+                    f'{"ускорение":>10}'
+                )
+                base = None
+                for workers in counts:
+                    elapsed = self.run(names, workers)
+                    base = base or elapsed
+                    self.stdout.write(
+                        f'{workers:>9} {elapsed:>7.2f} '
+                        f'{len(names) / elapsed:>11.1f} '
+                        f'{base / elapsed:>10.2f}'
+                    )
+        finally:
+            shutil.rmtree(media_root)
+
+    def upload(self, options):
+        content = make_image(options['width'], options['height'])
+        return [
+            default_storage.save(f'posts/bench-{i}.jpg', ContentFile(content))
+            for i in range(options['images'])
+        ]
+
+    def run(self, names, workers):
+        # Каждый прогон заново: готовые миниатюры от прошлого удаляются.
+        shutil.rmtree(
+            os.path.join(default_storage.location, 'cache'),
+            ignore_errors=True,
+        )
+        started = time.perf_counter()
+        with ProcessPoolExecutor(workers) as pool:
+            list(pool.map(thumbnails.render_thumbnails, names))
+        return time.perf_counter() - started
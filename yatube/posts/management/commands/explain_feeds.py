@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group
+from posts.utils import CURSOR_NEXT, encode_cursor
+
+User = get_user_model()
+
+FEED_TABLES = ('posts_post', 'posts_feedentry')
+
+# Из общего кеша страницы и фрагменты лент отдаются без SQL, и планов
+# не было бы; запросы с реплик не попали бы в connection основной БД.
+UNCACHED = {
+    'CACHES': {
+        'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    },
+    'DATABASE_REPLICAS': [],
+}
+
+
+def is_bad_step(detail, sql):
+    """Полный проход по таблице, проход по всему индексу или сортировка
+    во временном B-дереве.
+
+    SCAN по индексу допустим, только если запрос ограничен LIMIT:
+    тогда проход останавливается на первых строках страницы. Без LIMIT
+    (например, COUNT(*)) он читает весь индекс.
+    """
+    if 'TEMP B-TREE' in detail:
+        return True
+    if not detail.startswith('SCAN'):
+        return False
+    return 'USING' not in detail or ' LIMIT ' not in sql.upper()
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает EXPLAIN QUERY PLAN для каждого запроса лент: главной, '
+        'группы и профиля, в режимах pages и cursor.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Завершиться ошибкой, если найден полный проход '
+                 'таблицы или индекса без LIMIT или сортировка '
+                 'во временном B-дереве.',
+        )
+
+    def feed_urls(self):
+        urls = [reverse('posts:main_page')]
+        group = Group.objects.first()
+        if group is not None:
+            urls.append(reverse('posts:group_list', args=(group.slug,)))
+        author = User.objects.filter(posts__isnull=False).first()
+        if author is not None:
+            urls.append(reverse('posts:profile', args=(author.username,)))
+        cursor = encode_cursor(CURSOR_NEXT, timezone.now(), 0)
+        for url in urls:
+            yield f'{url}?page=2'
+            yield f'{url}?cursor={cursor}'
+
+    def handle(self, *args, **options):
+        with override_settings(**UNCACHED):
+            explained, bad_steps = self.explain_feeds()
+        if not explained:
+            raise CommandError('Не выполнено ни одного запроса лент.')
+        if bad_steps and options['strict']:
+            raise CommandError(
+                f'Найдено проблемных шагов в планах: {bad_steps}'
+            )
+
+    def explain_feeds(self):
+        client = Client()
+        explained = bad_steps = 0
+        for url in self.feed_urls():
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url)
+            for query in queries:
+                if not any(
+                    table in query['sql'] for table in FEED_TABLES
+                ):
+                    continue
+                explained += 1
+                self.stdout.write(self.style.MIGRATE_HEADING(url))
+                self.stdout.write(query['sql'])
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plan = cursor.fetchall()
+                for row in plan:
+                    detail = row[-1]
+                    if is_bad_step(detail, query['sql']):
+                        bad_steps += 1
+                        self.stdout.write(self.style.ERROR(f'  {detail}'))
+                    else:
+                        self.stdout.write(f'  {detail}')
+        return explained, bad_steps
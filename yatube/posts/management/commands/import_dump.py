@@ -0,0 +1,191 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# Порядок вставки внутри пачки: сначала те, на кого ссылаются.
+MODELS = {
+    'auth.user': User,
+    'posts.group': Group,
+    'posts.post': Post,
+}
+
+
+def iter_dump(file, read_size=1 << 20):
+    """Объекты верхнеуровневого JSON-массива по одному, не читая
+    файл целиком."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    array_started = False
+    while True:
+        chunk = file.read(read_size)
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and (
+                buffer[position] in ' \t\r\n,'
+                or (buffer[position] == '[' and not array_started)
+            ):
+                array_started = array_started or buffer[position] == '['
+                position += 1
+            if position == len(buffer):
+                break
+            if buffer[position] == ']':
+                return
+            try:
+                obj, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise CommandError('Дамп обрывается посреди объекта.')
+                break
+            yield obj
+        buffer = buffer[position:]
+        if not chunk:
+            return
+
+
+@contextmanager
+def keep_pub_date():
+    """auto_now_add перезаписал бы даты постов из дампа текущим временем."""
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает дамп в формате data.json (auth.user, '
+        'posts.group, posts.post) пачками через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dump')
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Объектов дампа на одну транзакцию.',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с последней сохранённой пачки.',
+        )
+
+    def handle(self, *args, **options):
+        state_path = options['dump'] + '.import-state'
+        done = 0
+        if options['resume'] and os.path.exists(state_path):
+            with open(state_path) as file:
+                done = json.load(file)['objects_done']
+            self.stdout.write(f'Продолжаем после объекта №{done}.')
+        self.inserted = dict.fromkeys(MODELS, 0)
+        self.pending = []
+        self.skipped = 0
+        started = time.perf_counter()
+        chunk = []
+        position = 0
+        with open(options['dump'], encoding='utf-8') as file, keep_pub_date():
+            for obj in iter_dump(file):
+                position += 1
+                if position <= done:
+                    continue
+                chunk.append((position, obj))
+                if len(chunk) == options['chunk_size']:
+                    self.import_chunk(chunk)
+                    self.save_state(state_path, position)
+                    self.report(started)
+                    chunk = []
+            self.import_chunk(chunk)
+        self.save_state(state_path, position)
+        self.finish(started, state_path)
+
+    def import_chunk(self, chunk):
+        by_model = {label: [] for label in MODELS}
+        for position, obj in chunk:
+            if obj.get('model') in by_model:
+                by_model[obj['model']].append((position, obj))
+            else:
+                self.skipped += 1
+        with transaction.atomic():
+            for label in ('auth.user', 'posts.group'):
+                self.insert(label, by_model[label])
+            self.insert_posts(self.pending + by_model['posts.post'])
+
+    def deserialize(self, items):
+        return [
+            item.object for item in serializers.deserialize(
+                'python', [obj for _, obj in items]
+            )
+        ]
+
+    def insert(self, label, items):
+        if items:
+            MODELS[label].objects.bulk_create(
+                self.deserialize(items), ignore_conflicts=True
+            )
+            self.inserted[label] += len(items)
+
+    def insert_posts(self, items):
+        """Посты, чьи автор или группа ещё не загружены, ждут
+        следующих пачек."""
+        posts = self.deserialize(items)
+        authors = set(User.objects.filter(
+            pk__in={post.author_id for post in posts}
+        ).values_list('pk', flat=True))
+        groups = set(Group.objects.filter(
+            pk__in={post.group_id for post in posts} - {None}
+        ).values_list('pk', flat=True))
+        ready, self.pending = [], []
+        for item, post in zip(items, posts):
+            if post.author_id in authors and (
+                post.group_id is None or post.group_id in groups
+            ):
+                ready.append(post)
+            else:
+                self.pending.append(item)
+        Post.objects.bulk_create(ready, ignore_conflicts=True)
+        self.inserted['posts.post'] += len(ready)
+
+    def save_state(self, state_path, position):
+        # Отложенные посты ещё не в БД, поэтому при продолжении
+        # начинаем с первого из них.
+        if self.pending:
+            position = self.pending[0][0] - 1
+        with open(state_path, 'w') as file:
+            json.dump({'objects_done': position}, file)
+
+    def report(self, started):
+        rows = sum(self.inserted.values())
+        rate = rows / (time.perf_counter() - started)
+        self.stdout.write(f'Загружено строк: {rows} ({rate:.0f} строк/с)')
+
+    def finish(self, started, state_path):
+        if self.pending:
+            raise CommandError(
+                f'Постов без автора или группы в дампе: {len(self.pending)}'
+            )
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                no_style(), list(MODELS.values())
+            ):
+                cursor.execute(sql)
+        call_command('recount', stdout=self.stdout)
+        os.remove(state_path)
+        self.report(started)
+        for label, count in self.inserted.items():
+            self.stdout.write(f'  {label}: {count}')
+        if self.skipped:
+            self.stdout.write(f'  пропущено объектов других моделей: '
+                              f'{self.skipped}')
@@ -0,0 +1,66 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+
+
+class Command(BaseCommand):
+    help = (
+        'Делает миниатюры картинок постов пулом процессов и отмечает '
+        'посты готовыми. С --watch не завершается и забирает новые '
+        'картинки раз в --interval секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--watch', action='store_true')
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        # Соединения с БД не должны переходить в дочерние процессы.
+        connections.close_all()
+        failed = set()
+        done = 0
+        with ProcessPoolExecutor(options['workers']) as pool:
+            while True:
+                processed = self.process(pool, options['batch_size'], failed)
+                done += processed
+                if processed:
+                    continue
+                if not options['watch']:
+                    break
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры готовы для {done - len(failed)} постов, '
+            f'ошибок: {len(failed)}.'
+        ))
+
+    def process(self, pool, batch_size, failed):
+        """Одна пачка постов; возвращает, сколько из них обработано.
+
+        Картинки, которые не удалось открыть, запоминаются и больше
+        не берутся в работу до перезапуска команды."""
+        batch = list(
+            thumbnails.pending_posts().exclude(
+                id__in=failed
+            ).values_list('id', 'image')[:batch_size]
+        )
+        futures = {
+            pool.submit(thumbnails.render_thumbnails, name): (post_id, name)
+            for post_id, name in batch
+        }
+        for future in as_completed(futures):
+            post_id, name = futures[future]
+            try:
+                future.result()
+            except Exception as error:
+                failed.add(post_id)
+                self.stderr.write(f'Пост {post_id}, {name}: {error}')
+            else:
+                thumbnails.mark_ready(post_id, name)
+        return len(batch)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import feed
+from posts.models import FeedEntry, Post
+
+from .recount import batches
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает таблицу ленты FeedEntry по постам. Работает '
+        'диапазонами ключей, каждый - в своей транзакции, так что лента '
+        'не пустеет на время перестройки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        total = last_pk = 0
+        for pks in batches(Post.objects.all(), options['batch_size']):
+            with transaction.atomic():
+                FeedEntry.objects.filter(
+                    post_id__gt=last_pk, post_id__lte=pks[-1]
+                ).delete()
+                total += feed.fill_missing(
+                    'p.id > %s AND p.id <= %s', [last_pk, pks[-1]]
+                )
+            last_pk = pks[-1]
+        FeedEntry.objects.filter(post_id__gt=last_pk).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f'Лента перестроена: {total} записей.')
+        )
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import AuthorStats, Group, Post
+
+User = get_user_model()
+
+
+def batches(queryset, batch_size):
+    """Первичные ключи пачками, без OFFSET по всей таблице."""
+    last_pk = 0
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', flat=True
+            )[:batch_size]
+        )
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def actual_counts(field, pks):
+    return dict(
+        Post.objects.filter(**{f'{field}__in': pks}).order_by().values(
+            field
+        ).annotate(total=Count('id')).values_list(field, 'total')
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов у групп и авторов и исправляет '
+        'расхождения. Работает пачками, каждая - в своей транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed_groups = fixed_authors = 0
+        for pks in batches(Group.objects.all(), batch_size):
+            with transaction.atomic():
+                counts = actual_counts('group_id', pks)
+                changed = [
+                    group for group in Group.objects.filter(pk__in=pks)
+                    if group.posts_count != counts.get(group.pk, 0)
+                ]
+                for group in changed:
+                    group.posts_count = counts.get(group.pk, 0)
+                Group.objects.bulk_update(changed, ('posts_count',))
+                fixed_groups += len(changed)
+        for pks in batches(User.objects.all(), batch_size):
+            with transaction.atomic():
+                counts = actual_counts('author_id', pks)
+                stats = AuthorStats.objects.in_bulk(pks)
+                changed = [
+                    AuthorStats(user_id=pk, posts_count=counts.get(pk, 0))
+                    for pk in pks
+                    if pk in stats
+                    and stats[pk].posts_count != counts.get(pk, 0)
+                ]
+                missing = [
+                    AuthorStats(user_id=pk, posts_count=counts.get(pk, 0))
+                    for pk in pks if pk not in stats
+                ]
+                AuthorStats.objects.bulk_update(changed, ('posts_count',))
+                AuthorStats.objects.bulk_create(missing)
+                fixed_authors += len(changed) + len(missing)
+        self.stdout.write(
+            f'Исправлено счётчиков: групп - {fixed_groups}, '
+            f'авторов - {fixed_authors}'
+        )
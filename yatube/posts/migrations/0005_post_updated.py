@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+from posts import search
+
+
+def fill_updated(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(updated=F('pub_date'))
+
+
+def install_search(apps, schema_editor):
+    # SQLite пересоздаёт posts_post при добавлении и удалении
+    # столбца, и триггеры полнотекстового индекса пропадают.
+    search.install(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, install_search),
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_updated, migrations.RunPython.noop),
+        migrations.RunPython(install_search, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_feed(apps, schema_editor):
+    # SQL зафиксирован на схеме этой миграции: posts.feed.fill_missing
+    # знает о столбцах, добавленных позже.
+    schema_editor.execute("""
+        INSERT INTO posts_feedentry (
+            post_id, pub_date, author_id, author_username,
+            group_id, group_slug, group_title, text, text_truncated
+        )
+        SELECT
+            p.id, p.pub_date, p.author_id, u.username,
+            p.group_id, COALESCE(g.slug, ''), COALESCE(g.title, ''),
+            SUBSTR(p.text, 1, 1000), LENGTH(p.text) > 1000
+        FROM posts_post p
+        INNER JOIN auth_user u ON u.id = p.author_id
+        LEFT JOIN posts_group g ON g.id = p.group_id
+    """)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_entry', serialize=False, to='posts.Post')),
+                ('pub_date', models.DateTimeField()),
+                ('author_id', models.IntegerField()),
+                ('author_username', models.CharField(max_length=150)),
+                ('group_id', models.IntegerField(blank=True, null=True)),
+                ('group_slug', models.CharField(blank=True, max_length=100)),
+                ('group_title', models.CharField(blank=True, max_length=200)),
+                ('text', models.TextField()),
+                ('text_truncated', models.BooleanField(default=False)),
+            ],
+            options={
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['pub_date'], name='feed_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['group_id', 'pub_date'], name='feed_group_pub_date_idx'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
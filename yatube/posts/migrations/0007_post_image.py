@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:41
+
+from django.db import migrations, models
+
+from posts import search
+
+
+def install_search(apps, schema_editor):
+    # SQLite пересоздаёт posts_post при добавлении столбцов,
+    # и триггеры полнотекстового индекса пропадают.
+    search.install(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_feedentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, install_search),
+        migrations.AddField(
+            model_name='feedentry',
+            name='image',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='feedentry',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Загрузите картинку', upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('thumbnails_ready', False), models.Q(_negated=True, image='')), fields=['id'], name='post_thumbnails_pending_idx'),
+        ),
+        migrations.RunPython(install_search, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['author_id', 'pub_date'], name='feed_author_pub_date_idx'),
+        ),
+    ]
@@ -1,13 +1,27 @@
+from collections import Counter
+
 from django.db import models
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# bulk_create не отправляет post_save; об этих постах сообщаем отдельно.
+posts_bulk_created = Signal(providing_args=['posts'])
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов',
+    )
 
     class Meta:
         verbose_name = 'группа'
@@ -17,9 +31,49 @@ class Group(models.Model):
         return self.title
 
 
+class AuthorStats(models.Model):
+    """Счётчики автора, чтобы не считать его посты на каждой странице."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов',
+    )
+
+    class Meta:
+        verbose_name = 'статистика автора'
+        verbose_name_plural = 'статистика авторов'
+
+    def __str__(self):
+        return f'{self.user}: {self.posts_count}'
+
+
+class PostQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create не отправляет сигналы, счётчики правим сами.
+        objs = super().bulk_create(objs, *args, **kwargs)
+        authors = Counter(post.author_id for post in objs)
+        groups = Counter(
+            post.group_id for post in objs if post.group_id is not None
+        )
+        for author_id, delta in authors.items():
+            change_author_count(author_id, delta)
+        for group_id, delta in groups.items():
+            change_group_count(group_id, delta)
+        posts_bulk_created.send(sender=self.model, posts=objs)
+        return objs
+
+
 class Post(models.Model):
     text = models.TextField(help_text='Текст поста', verbose_name='')
     pub_date = models.DateTimeField(auto_now_add=True)
+    # Время последней правки: Last-Modified страницы поста.
+    updated = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -35,12 +89,222 @@ class Post(models.Model):
         help_text='Выберите группу',
         verbose_name='Группа'
     )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True,
+        help_text='Загрузите картинку',
+    )
+    # Миниатюры картинки готовы. Их делает команда make_thumbnails
+    # вне запросов (см. posts/thumbnails.py).
+    thumbnails_ready = models.BooleanField(default=False, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        # Индексы под выборки лент: главной, группы и профиля.
+        indexes = (
+            models.Index(fields=('pub_date',), name='post_pub_date_idx'),
+            models.Index(
+                fields=('group', 'pub_date'), name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date'), name='post_author_pub_date_idx'
+            ),
+            # Частичный индекс: очередь постов, ждущих миниатюр.
+            models.Index(
+                fields=('id',),
+                name='post_thumbnails_pending_idx',
+                condition=Q(thumbnails_ready=False) & ~Q(image=''),
+            ),
+        )
         verbose_name = 'пост'
         verbose_name_plural = 'посты'
 
     def __str__(self):
         return self.text[:15]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_saved_state()
+        return instance
+
+    def save(self, *args, **kwargs):
+        saved_image = getattr(self, '_saved_state', {}).get('image')
+        if saved_image is not None and saved_image != self.image.name:
+            # Миниатюры прежней картинки новой не подходят.
+            self.thumbnails_ready = False
+        super().save(*args, **kwargs)
+        self._remember_saved_state()
+
+    def _remember_saved_state(self):
+        """Автор, группа и картинка поста, какими они записаны в БД:
+        обработчики post_save сравнивают с ними новые значения."""
+        image = self.__dict__.get('image')
+        self._saved_state = {
+            'author_id': self.__dict__.get('author_id'),
+            'group_id': self.__dict__.get('group_id'),
+            'image': getattr(image, 'name', image),
+        }
+
+
+class FeedEntry(models.Model):
+    """Строка ленты главной и страниц групп.
+
+    Хранит всё для вывода поста в ленте, поэтому страница ленты
+    читается из одной таблицы без соединений с авторами и группами.
+    Синхронизируется обработчиками из posts/feed.py, перестраивается
+    командой rebuild_feed.
+    """
+    EXCERPT_LENGTH = 1000
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_entry',
+    )
+    pub_date = models.DateTimeField()
+    author_id = models.IntegerField()
+    author_username = models.CharField(max_length=150)
+    group_id = models.IntegerField(blank=True, null=True)
+    group_slug = models.CharField(max_length=100, blank=True)
+    group_title = models.CharField(max_length=200, blank=True)
+    text = models.TextField()
+    text_truncated = models.BooleanField(default=False)
+    image = models.CharField(max_length=100, blank=True)
+    thumbnails_ready = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('pub_date',), name='feed_pub_date_idx'),
+            models.Index(
+                fields=('group_id', 'pub_date'), name='feed_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author_id', 'pub_date'),
+                name='feed_author_pub_date_idx',
+            ),
+        )
+
+    def __str__(self):
+        return self.text[:15]
+
+    def as_post(self, group=None):
+        """Несохранённый пост для шаблонов ленты; group - уже загруженная
+        группа страницы, у которой есть и описание."""
+        post = Post(
+            id=self.post_id,
+            pub_date=self.pub_date,
+            text=self.text,
+            image=self.image,
+            thumbnails_ready=self.thumbnails_ready,
+        )
+        author = User(id=self.author_id, username=self.author_username)
+        # Без БД у экземпляров присваивание связи спросило бы
+        # у роутера db_for_write, как перед записью.
+        post._state.db = author._state.db = self._state.db
+        post.author = author
+        if self.group_id is not None:
+            if group is None:
+                group = Group(
+                    id=self.group_id,
+                    slug=self.group_slug,
+                    title=self.group_title,
+                )
+                group._state.db = self._state.db
+            post.group = group
+        post.text_truncated = self.text_truncated
+        return post
+
+
+def change_author_count(author_id, delta):
+    updated = AuthorStats.objects.filter(user_id=author_id).update(
+        posts_count=Greatest(F('posts_count') + delta, 0)
+    )
+    if not updated and delta > 0:
+        AuthorStats.objects.get_or_create(
+            user_id=author_id,
+            defaults={
+                'posts_count': Post.objects.filter(author_id=author_id).count()
+            },
+        )
+
+
+def total_posts_count():
+    """Число всех постов по счётчикам авторов: строк в них столько,
+    сколько авторов, а не постов, как у COUNT(*) по ленте."""
+    total = AuthorStats.objects.aggregate(total=Sum('posts_count'))
+    return total['total'] or 0
+
+
+def change_group_count(group_id, delta):
+    Group.objects.filter(pk=group_id).update(
+        posts_count=Greatest(F('posts_count') + delta, 0)
+    )
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, raw, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_state = None
+    elif hasattr(instance, '_saved_state'):
+        instance._previous_state = instance._saved_state
+    else:
+        instance._previous_state = Post.objects.filter(
+            pk=instance.pk
+        ).values('author_id', 'group_id').first()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = instance._previous_state
+    if previous is None:
+        change_author_count(instance.author_id, 1)
+        if instance.group_id is not None:
+            change_group_count(instance.group_id, 1)
+    else:
+        if previous['author_id'] != instance.author_id:
+            change_author_count(previous['author_id'], -1)
+            change_author_count(instance.author_id, 1)
+        if previous['group_id'] != instance.group_id:
+            if previous['group_id'] is not None:
+                change_group_count(previous['group_id'], -1)
+            if instance.group_id is not None:
+                change_group_count(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    # Срабатывает и при каскадном удалении постов вместе с автором.
+    change_author_count(instance.author_id, -1)
+    if instance.group_id is not None:
+        change_group_count(instance.group_id, -1)
+
+
+def renames_username(instance, update_fields):
+    return not instance._state.adding and (
+        update_fields is None or 'username' in update_fields
+    )
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw, update_fields, **kwargs):
+    """Прежнее имя пользователя, если сохранение может его сменить:
+    по нему обработчики post_save решают, менять ли ленты."""
+    instance._previous_username = None
+    if not raw and renames_username(instance, update_fields):
+        instance._previous_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+def username_changed(user):
+    previous = getattr(user, '_previous_username', None)
+    return previous is not None and previous != user.username
@@ -0,0 +1,138 @@
+"""Полнотекстовый поиск по Post.text на SQLite FTS5.
+
+Индекс - внешняя FTS5-таблица над posts_post, синхронизируется
+триггерами, поэтому в неё попадают и bulk_create, и update().
+На других СУБД поиск откатывается к icontains.
+"""
+import re
+
+from django.db import connection
+
+TABLE = 'posts_post_fts'
+
+CREATE_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+        text, content='posts_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_insert AFTER INSERT ON posts_post
+    BEGIN
+        INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_delete AFTER DELETE ON posts_post
+    BEGIN
+        INSERT INTO {TABLE}({TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_update
+    AFTER UPDATE OF text ON posts_post
+    BEGIN
+        INSERT INTO {TABLE}({TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+)
+DROP_SQL = (
+    f'DROP TRIGGER IF EXISTS {TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {TABLE}_update',
+    f'DROP TABLE IF EXISTS {TABLE}',
+)
+REBUILD_SQL = f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')"
+MATCH_SQL = f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s'
+
+
+def is_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install(schema_editor):
+    """Создаёт индекс и триггеры. Вызывается из миграций, в том числе
+    после тех, что пересоздают posts_post и теряют его триггеры."""
+    if not is_available(schema_editor.connection):
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+    schema_editor.execute(REBUILD_SQL)
+
+
+def uninstall(schema_editor):
+    if not is_available(schema_editor.connection):
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+def rebuild():
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD_SQL)
+
+
+def match_expression(query):
+    """Каждое слово запроса - отдельная фраза с поиском по префиксу,
+    так пользовательский ввод не ломает синтаксис FTS5."""
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def filter_queryset(queryset, query):
+    """Оставляет в queryset постов только найденные по индексу.
+
+    RawSQL в pk__in не подходит: Django оборачивает его в двойные
+    скобки, и SQLite берёт из подзапроса лишь первую строку.
+    """
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        where=[f'"{table}"."id" IN ({MATCH_SQL})'],
+        params=[match_expression(query)],
+    )
+
+
+class SearchResults:
+    """Найденные посты в порядке релевантности; отдаёт Paginator
+    только нужный срез."""
+
+    def __init__(self, queryset, query):
+        self.queryset = queryset
+        self.query = query.strip()
+        self.expression = match_expression(query)
+
+    def count(self):
+        if not self.expression:
+            return 0
+        if not is_available():
+            return self.queryset.filter(text__icontains=self.query).count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s',
+                [self.expression],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            raise TypeError('SearchResults поддерживает только срезы.')
+        if not self.expression:
+            return []
+        if not is_available():
+            return self.queryset.filter(text__icontains=self.query)[index]
+        limit = index.stop - index.start
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'{MATCH_SQL} ORDER BY rank LIMIT %s OFFSET %s',
+                [self.expression, limit, index.start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = self.queryset.in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,150 @@
+"""RSS- и Atom-ленты главной, групп и авторов.
+
+Читалки опрашивают ленты каждые несколько минут, поэтому готовый XML
+кешируется под версией ленты из posts/cache.py, а ETag строится из той
+же версии: опрос без новых постов получает 304, не касаясь постов в БД.
+"""
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date
+from django.utils.text import Truncator
+
+from core import single_flight
+
+from . import cache
+from .feed import FeedPosts
+from .models import FeedEntry
+from .views import get_author, get_group
+
+ITEMS_IN_FEED = 20
+
+
+class PostsFeed(Feed):
+    """Общая часть лент: пункты - посты, ссылка - страница поста."""
+
+    def item_title(self, item):
+        return Truncator(item.text).words(8)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.username
+
+
+class IndexFeed(PostsFeed):
+    title = 'Yatube: последние записи'
+    description = 'Последние записи на сайте'
+
+    def link(self):
+        return reverse('posts:main_page')
+
+    def items(self):
+        return FeedPosts(FeedEntry.objects.all()[:ITEMS_IN_FEED])
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, any_slug):
+        return get_group(request, any_slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def description(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+    def items(self, group):
+        return FeedPosts(
+            FeedEntry.objects.filter(group_id=group.pk)[:ITEMS_IN_FEED], group
+        )
+
+
+class AuthorFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_author(request, username)
+
+    def title(self, author):
+        return f'Yatube: записи {author.username}'
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def items(self, author):
+        posts = list(author.posts.all()[:ITEMS_IN_FEED])
+        for post in posts:
+            post.author = author
+        return posts
+
+
+def atom(feed_class):
+    return type(
+        f'Atom{feed_class.__name__}',
+        (feed_class,),
+        {'feed_type': Atom1Feed, 'subtitle': feed_class.description},
+    )
+
+
+def cached_feed(feed_class, scope, get_object=None):
+    """Представление ленты с кешем XML и условными GET.
+
+    get_object(request, key) - группа или автор ленты по ключу из адреса;
+    их первичный ключ выбирает версию в кеше.
+    """
+    feed = feed_class()
+    kind = feed.feed_type.__name__
+
+    def view(request, **kwargs):
+        pk = None
+        if get_object is not None:
+            pk = get_object(request, *kwargs.values()).pk
+        if cache.replicas_may_lag(scope, pk):
+            return feed(request, **kwargs)
+
+        def build():
+            response = feed(request, **kwargs)
+            return response.content, response['Content-Type']
+
+        # Новую версию собирает один запрос, остальные получают прежнюю
+        # с её ETag и Last-Modified.
+        entry = single_flight.fetch(
+            cache.feed_cache(), f'syndication:{kind}:{scope}:{pk}',
+            cache.feed_version(scope, pk), build, settings.FEED_CACHE_TIMEOUT,
+        )
+        etag = f'"{kind}.{entry.version}"'
+        last_modified = int(entry.built)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+        content, content_type = entry.value
+        response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    return view
+
+
+index_rss = cached_feed(IndexFeed, cache.INDEX)
+index_atom = cached_feed(atom(IndexFeed), cache.INDEX)
+group_rss = cached_feed(GroupFeed, cache.GROUP, get_group)
+group_atom = cached_feed(atom(GroupFeed), cache.GROUP, get_group)
+author_rss = cached_feed(AuthorFeed, cache.AUTHOR, get_author)
+author_atom = cached_feed(atom(AuthorFeed), cache.AUTHOR, get_author)
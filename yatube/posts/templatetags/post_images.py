@@ -0,0 +1,15 @@
+from django import template
+from django.templatetags.static import static
+
+from posts.thumbnails import thumbnail_url
+
+register = template.Library()
+
+PLACEHOLDER = 'img/thumbnail-placeholder.svg'
+
+
+@register.filter
+def thumbnail(post, size):
+    """Адрес миниатюры картинки поста или заглушки, пока миниатюра
+    готовится."""
+    return thumbnail_url(post, size) or static(PLACEHOLDER)
@@ -0,0 +1,112 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..admin import AdminPostQuerySet
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class TestPostAdminChangelist(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+        self.groups = [
+            Group.objects.create(
+                title=f'Группа {i}', slug=f'group-{i}', description='-'
+            ) for i in range(3)
+        ]
+        self.url = reverse('admin:posts_post_changelist')
+
+    def add_posts(self, count):
+        start = Post.objects.count()
+        for i in range(start, start + count):
+            Post.objects.create(
+                text=f'Пост {i}',
+                author=User.objects.create_user(username=f'author-{i}'),
+                group=self.groups[i % len(self.groups)],
+            )
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries]
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов не зависит от числа строк на странице."""
+        self.add_posts(2)
+        self.changelist_queries()
+        few = self.changelist_queries()
+        self.add_posts(30)
+        many = self.changelist_queries()
+        self.assertEqual(len(few), len(many))
+
+    def test_no_full_table_count(self):
+        """Без фильтров число постов берётся из счётчиков авторов."""
+        self.add_posts(5)
+        queries = self.changelist_queries()
+        self.assertFalse([
+            sql for sql in queries
+            if 'COUNT(' in sql and 'FROM "posts_post"' in sql
+        ])
+        response = self.admin_client.get(self.url)
+        self.assertEqual(response.context['cl'].result_count, 5)
+
+    def test_group_choices_follow_group_changes(self):
+        """Кешированный список групп обновляется после правки группы."""
+        self.add_posts(1)
+        self.admin_client.get(self.url)
+        Group.objects.create(title='Новая группа', slug='new', description='-')
+        response = self.admin_client.get(self.url)
+        self.assertContains(response, 'Новая группа')
+
+    def test_date_hierarchy(self):
+        """Переход по датам фильтрует посты по pub_date."""
+        self.add_posts(3)
+        year = Post.objects.first().pub_date.year
+        response = self.admin_client.get(self.url, {'pub_date__year': year})
+        self.assertEqual(response.context['cl'].result_count, 3)
+        response = self.admin_client.get(
+            self.url, {'pub_date__year': year - 1}
+        )
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+
+class AdminPostQuerySetTest(TestCase):
+    def test_dates_match_orm(self):
+        """Даты прыжками по индексу совпадают с обычным dates()."""
+        author = User.objects.create_user(username='auth')
+        for date in (
+            '2019-12-31 23:59:59', '2020-01-01 00:00:00',
+            '2020-02-29 12:00:00', '2020-02-29 18:00:00',
+            '2021-07-15 08:30:00',
+        ):
+            post = Post.objects.create(author=author, text=date)
+            Post.objects.filter(pk=post.pk).update(pub_date=date + 'Z')
+        queryset = AdminPostQuerySet(Post)
+        for kind in ('year', 'month', 'day'):
+            for order in ('ASC', 'DESC'):
+                with self.subTest(kind=kind, order=order):
+                    self.assertEqual(
+                        queryset.dates('pub_date', kind, order),
+                        list(Post.objects.dates('pub_date', kind, order)),
+                    )
+        self.assertEqual(
+            queryset.filter(pub_date__year=2020).dates('pub_date', 'day'),
+            [datetime.date(2020, 1, 1), datetime.date(2020, 2, 29)],
+        )
+
+    def test_default_manager_unchanged(self):
+        """Post.objects.dates() остаётся QuerySet, как в Django."""
+        self.assertEqual(Post.objects.dates('pub_date', 'year').count(), 0)
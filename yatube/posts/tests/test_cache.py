@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import routers
+
+from .. import cache as feed_cache
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+# Гостю страница целиком отдаётся из кеша страниц (core/page_cache.py)
+# и скрыла бы работу кеша фрагментов; его проверяют отдельные тесты.
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class TestFeedFragmentCache(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.second_group = Group.objects.create(
+            title='Вторая группа',
+            slug='second_group',
+            description='Описание второй группы',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост группы',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.urls = (
+            reverse('posts:main_page'),
+            reverse('posts:group_list', kwargs={'any_slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+        )
+
+    def get_posts_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        posts_selects = [
+            query for query in queries
+            if query['sql'].startswith((
+                'SELECT "posts_post"."id"',
+                'SELECT "posts_feedentry"."post_id"',
+            ))
+        ]
+        return response, posts_selects
+
+    def test_second_request_hits_cache(self):
+        """Повторный запрос отдаёт список постов из кеша,
+        не выбирая посты из БД."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response, selects = self.get_posts_queries(url)
+                self.assertContains(response, self.post.text)
+                self.assertEqual(len(selects), 1)
+                response, selects = self.get_posts_queries(url)
+                self.assertContains(response, self.post.text)
+                self.assertEqual(len(selects), 0)
+
+    def test_new_post_misses_cache(self):
+        """Новый пост меняет версию лент и сразу виден на страницах."""
+        for url in self.urls:
+            self.guest_client.get(url)
+        new_post = Post.objects.create(
+            author=self.author,
+            text='Свежий пост',
+            group=self.group,
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                response, selects = self.get_posts_queries(url)
+                self.assertContains(response, new_post.text)
+                self.assertEqual(len(selects), 1)
+
+    def test_username_change_invalidates_feeds(self):
+        """Новое имя автора сразу видно в лентах главной, группы и RSS."""
+        urls = (*self.urls[:2], reverse('posts:index_rss'))
+        for url in urls:
+            self.guest_client.get(url)
+        author = User.objects.get(pk=self.author.pk)
+        author.username = 'renamed'
+        author.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'renamed')
+
+    def test_group_change_invalidates_old_group(self):
+        """Перенос поста в другую группу сбрасывает кеш прежней группы."""
+        url = reverse(
+            'posts:group_list', kwargs={'any_slug': self.group.slug}
+        )
+        self.guest_client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.second_group
+        post.save()
+        response = self.guest_client.get(url)
+        self.assertNotContains(response, self.post.text)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class TestReplicaLag(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='auth')
+        _, token = routers.start()
+        self.addCleanup(routers.stop, token)
+
+    def test_no_caching_while_replicas_lag(self):
+        """Пока реплики могут отставать от свежей правки, ленту
+        не кешируют и ETag не выдают; закреплённому запросу можно."""
+        Post.objects.create(author=self.author, text='Свежий пост')
+        request = RequestFactory().get('/')
+        _, token = routers.start()
+        self.assertEqual(feed_cache.feed_cache_timeout(feed_cache.INDEX), 0)
+        self.assertIsNone(feed_cache.feed_etag(request, feed_cache.INDEX))
+        routers.stop(token)
+        _, token = routers.start(pinned=True)
+        self.assertTrue(feed_cache.feed_cache_timeout(feed_cache.INDEX))
+        self.assertTrue(feed_cache.feed_etag(request, feed_cache.INDEX))
+        routers.stop(token)
@@ -0,0 +1,194 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..management.commands.explain_feeds import is_bad_step
+from ..models import AuthorStats, FeedEntry, Group, Post
+
+User = get_user_model()
+
+
+class TestExplainFeeds(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост группы',
+            group=cls.group,
+        )
+
+    def test_feed_plans_use_indexes(self):
+        """Запросы лент идут по индексам, без полных проходов
+        и сортировок во временном B-дереве."""
+        out = StringIO()
+        call_command('explain_feeds', strict=True, stdout=out)
+        output = out.getvalue()
+        for index in (
+            'feed_pub_date_idx',
+            'feed_group_pub_date_idx',
+            'post_author_pub_date_idx',
+        ):
+            with self.subTest(index=index):
+                self.assertIn(index, output)
+
+    def test_warm_cache_still_explained(self):
+        """Прогретый кеш страниц и лент не прячет запросы от команды."""
+        client = Client()
+        client.get(reverse('posts:main_page'))
+        client.get(reverse('posts:main_page'), {'page': 2})
+        out = StringIO()
+        call_command('explain_feeds', strict=True, stdout=out)
+        self.assertIn(f'{reverse("posts:main_page")}?page=2', out.getvalue())
+
+    def test_unbounded_index_scan_is_bad(self):
+        """Проход по всему индексу без LIMIT, как у COUNT(*), -
+        проблемный шаг; тот же проход со LIMIT - нет."""
+        for sql, bad in (
+            ('SELECT COUNT(*) FROM posts_feedentry', True),
+            ('SELECT post_id FROM posts_feedentry '
+             'ORDER BY pub_date DESC LIMIT 10', False),
+        ):
+            with self.subTest(sql=sql):
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                    details = [row[-1] for row in cursor.fetchall()]
+                self.assertIn('USING', ' '.join(details))
+                self.assertEqual(
+                    any(is_bad_step(detail, sql) for detail in details), bad
+                )
+
+
+class TestRecount(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            [Post(
+                author=self.author,
+                text=f'Тестовый текст №{i}',
+                group=self.group,
+            ) for i in range(3)]
+        )
+
+    def test_recount_repairs_drift(self):
+        """recount исправляет разошедшиеся и недостающие счётчики."""
+        Group.objects.update(posts_count=100)
+        AuthorStats.objects.all().delete()
+        call_command('recount', batch_size=1, stdout=StringIO())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 3)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 3
+        )
+
+
+class TestRebuildFeed(TestCase):
+    def test_rebuild_feed_repairs_drift(self):
+        """rebuild_feed восстанавливает удалённые и испорченные строки."""
+        author = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            [Post(author=author, text=f'Тестовый текст №{i}')
+             for i in range(5)]
+        )
+        FeedEntry.objects.order_by('post_id').first().delete()
+        FeedEntry.objects.update(author_username='stale')
+        call_command('rebuild_feed', batch_size=2, stdout=StringIO())
+        self.assertEqual(FeedEntry.objects.count(), 5)
+        self.assertFalse(
+            FeedEntry.objects.filter(author_username='stale').exists()
+        )
+
+
+class TestImportDump(TestCase):
+    dump = [
+        {
+            'model': 'posts.post',
+            'pk': 10,
+            'fields': {
+                'text': 'Пост раньше автора',
+                'pub_date': '2019-10-01T10:00:00Z',
+                'author': 7,
+                'group': 3,
+            },
+        },
+        {'model': 'sessions.session', 'pk': 'key', 'fields': {}},
+        {
+            'model': 'posts.group',
+            'pk': 3,
+            'fields': {
+                'title': 'Группа из дампа',
+                'slug': 'dump_group',
+                'description': 'Описание',
+            },
+        },
+        {
+            'model': 'auth.user',
+            'pk': 7,
+            'fields': {
+                'password': '!',
+                'username': 'dump_user',
+                'date_joined': '2019-10-01T09:00:00Z',
+            },
+        },
+        {
+            'model': 'posts.post',
+            'pk': 11,
+            'fields': {
+                'text': 'Пост без группы',
+                'pub_date': '2019-10-02T10:00:00Z',
+                'author': 7,
+                'group': None,
+            },
+        },
+    ]
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w', encoding='utf-8') as file:
+            json.dump(self.dump, file, ensure_ascii=False)
+        self.addCleanup(os.remove, self.path)
+
+    def test_import_resolves_foreign_keys(self):
+        """Пост, идущий в дампе раньше автора и группы, загружается
+        после них; даты и счётчики сохраняются."""
+        call_command(
+            'import_dump', self.path, chunk_size=2, stdout=StringIO()
+        )
+        post = Post.objects.get(pk=10)
+        self.assertEqual(post.author.username, 'dump_user')
+        self.assertEqual(post.group.slug, 'dump_group')
+        self.assertEqual(
+            post.pub_date.isoformat(), '2019-10-01T10:00:00+00:00'
+        )
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Group.objects.get(pk=3).posts_count, 1)
+        self.assertEqual(AuthorStats.objects.get(user_id=7).posts_count, 2)
+        self.assertFalse(os.path.exists(self.path + '.import-state'))
+
+    def test_resume(self):
+        """--resume пропускает уже загруженные объекты."""
+        with open(self.path + '.import-state', 'w') as file:
+            json.dump({'objects_done': 4}, file)
+        User.objects.create_user(username='dump_user', pk=7)
+        out = StringIO()
+        call_command('import_dump', self.path, resume=True, stdout=out)
+        self.assertIn('posts.post: 1', out.getvalue())
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [11])
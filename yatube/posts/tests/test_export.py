@@ -0,0 +1,130 @@
+import datetime
+import json
+import os
+import tracemalloc
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.bench import seed
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+# Выгрузка миллиона постов идёт несколько минут, поэтому
+# запускается только по запросу: YATUBE_SLOW_TESTS=1.
+SLOW_TESTS = bool(os.environ.get('YATUBE_SLOW_TESTS'))
+
+
+def read_ndjson(response):
+    content = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+class TestExport(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='auth')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        dates = ('2020-01-01 10:00', '2020-01-02 10:00', '2020-01-03 10:00')
+        self.posts = []
+        for number, date in enumerate(dates):
+            post = Post.objects.create(
+                author=self.author if number < 2 else self.other,
+                text=f'Пост №{number}',
+                group=self.group if number else None,
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.make_aware(
+                    datetime.datetime.fromisoformat(date)
+                )
+            )
+            self.posts.append(post)
+        self.guest_client = Client()
+
+    def export(self, **params):
+        return self.guest_client.get(reverse('posts:export'), params)
+
+    def exported_ids(self, **params):
+        return [row['id'] for row in read_ndjson(self.export(**params))]
+
+    def test_ndjson_rows(self):
+        """Выгрузка отдаёт по строке JSON на пост в порядке публикации."""
+        response = self.export()
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Type'], 'application/x-ndjson; charset=utf-8'
+        )
+        rows = read_ndjson(response)
+        self.assertEqual([row['id'] for row in rows],
+                         [post.pk for post in self.posts])
+        self.assertEqual(rows[1], {
+            'id': self.posts[1].pk,
+            'text': 'Пост №1',
+            'pub_date': '2020-01-02T10:00:00Z',
+            'author': 'auth',
+            'group': 'test_slug',
+        })
+        self.assertIsNone(rows[0]['group'])
+
+    def test_filters(self):
+        ids = [post.pk for post in self.posts]
+        cases = (
+            ({'author': 'auth'}, ids[:2]),
+            ({'group': 'test_slug'}, ids[1:]),
+            ({'author': 'auth', 'group': 'test_slug'}, ids[1:2]),
+            ({'since': '2020-01-02'}, ids[1:]),
+            ({'until': '2020-01-02'}, ids[:2]),
+            ({'since': '2020-01-02T10:00:00Z',
+              'until': '2020-01-02T10:00:00Z'}, ids[1:2]),
+        )
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(self.exported_ids(**params), expected)
+
+    def test_bad_params(self):
+        self.assertEqual(self.export(since='вчера').status_code, 400)
+        self.assertEqual(self.export(format='xml').status_code, 400)
+        self.assertEqual(self.export(author='nobody').status_code, 404)
+        self.assertEqual(self.export(group='nothing').status_code, 404)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_json_array(self):
+        """Формат json - один массив, сколько бы ни было кусков."""
+        response = self.export(format='json')
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['id'] for row in rows],
+                         [post.pk for post in self.posts])
+
+
+@skipUnless(SLOW_TESTS, 'Долгий тест: задайте YATUBE_SLOW_TESTS=1.')
+class TestExportMemory(TestCase):
+    ROWS = 1_000_000
+    PEAK_LIMIT = 32 * 1024 * 1024
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=100, groups=10, posts=cls.ROWS)
+
+    def test_memory_stays_flat(self):
+        """Пиковая память при выгрузке миллиона постов ограничена
+        и не растёт с их числом."""
+        response = Client().get(reverse('posts:export'))
+        rows = 0
+        tracemalloc.start()
+        try:
+            for chunk in response.streaming_content:
+                rows += chunk.count(b'\n')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(rows, self.ROWS)
+        self.assertLess(peak, self.PEAK_LIMIT)
@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.http import Http404
+from django.test import TestCase
+
+from .. import cache, lookups
+from ..models import AuthorStats, Group, Post
+
+User = get_user_model()
+
+
+class LookupCacheTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        lookups.groups.clear()
+        lookups.authors.clear()
+        self.author = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test_slug', description='Описание'
+        )
+        Post.objects.create(author=self.author, text='Пост', group=self.group)
+
+    def test_warm_lookup_without_queries(self):
+        lookups.group_by_slug('test_slug')
+        lookups.author_by_username('auth')
+        with self.assertNumQueries(0):
+            group = lookups.group_by_slug('test_slug')
+            author = lookups.author_by_username('auth')
+            self.assertEqual(author.stats.posts_count, 1)
+        self.assertEqual(group, self.group)
+        self.assertEqual(lookups.groups.stats()['hits'], 1)
+        self.assertEqual(lookups.authors.stats()['misses'], 1)
+
+    def test_missing_not_cached(self):
+        for _ in range(2):
+            with self.assertRaises(Http404):
+                lookups.group_by_slug('missing')
+        self.assertEqual(lookups.groups.stats()['size'], 0)
+
+    def test_changes_invalidate(self):
+        """Правка группы и автора и новые посты сбрасывают кеш."""
+        lookups.group_by_slug('test_slug')
+        lookups.author_by_username('auth')
+        Post.objects.create(author=self.author, text='Ещё', group=self.group)
+        self.assertEqual(lookups.group_by_slug('test_slug').posts_count, 2)
+        self.assertEqual(
+            lookups.author_by_username('auth').stats.posts_count, 2
+        )
+        self.group.slug = 'renamed'
+        self.group.save()
+        with self.assertRaises(Http404):
+            lookups.group_by_slug('test_slug')
+        self.author.delete()
+        with self.assertRaises(Http404):
+            lookups.author_by_username('auth')
+
+    def test_change_in_other_process(self):
+        """Изменение, о котором процесс узнал только по версии ленты
+        в общем кеше, сбрасывает объект и его счётчики."""
+        lookups.group_by_slug('test_slug')
+        lookups.author_by_username('auth')
+        # Другой процесс: строки меняются без сигналов в этом процессе,
+        # общие версии лент - те же, что меняют сигналы.
+        Group.objects.filter(pk=self.group.pk).update(
+            description='Новое описание', posts_count=5
+        )
+        cache.bump_version(cache.SITE)
+        group = lookups.group_by_slug('test_slug')
+        self.assertEqual(group.description, 'Новое описание')
+        self.assertEqual(group.posts_count, 5)
+        AuthorStats.objects.filter(user=self.author).update(posts_count=7)
+        cache.bump_version(cache.AUTHOR, self.author.pk)
+        self.assertEqual(
+            lookups.author_by_username('auth').stats.posts_count, 7
+        )
+
+    def test_change_during_cold_load(self):
+        """Изменение между загрузкой и чтением версии не оставляет
+        в кеше устаревший объект под новой версией."""
+        loads = []
+
+        def load():
+            group = Group.objects.get(slug='test_slug')
+            if not loads:
+                # Другой процесс меняет группу сразу после чтения строки.
+                Group.objects.filter(pk=group.pk).update(title='Новое')
+                cache.bump_version(cache.SITE)
+            loads.append(group)
+            return group
+
+        lookups.lookup(lookups.groups, 'test_slug', cache.GROUP, load)
+        self.assertEqual(lookups.group_by_slug('test_slug').title, 'Новое')
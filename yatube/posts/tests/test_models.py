@@ -1,7 +1,9 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Group, Post
+from ..models import AuthorStats, FeedEntry, Group, Post
 
 User = get_user_model()
 
@@ -59,3 +61,147 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     post._meta.get_field(field).verbose_name, expected_value
                 )
+
+
+class PostCountersTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        self.second_group = Group.objects.create(
+            title='Вторая группа',
+            slug='second_group',
+            description='Описание второй группы',
+        )
+
+    def assertCounters(self, author, group, second_group):
+        self.group.refresh_from_db()
+        self.second_group.refresh_from_db()
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.user).posts_count, author
+        )
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.second_group.posts_count, second_group)
+
+    def test_counters_follow_posts(self):
+        """Счётчики постов следуют за созданием, сменой группы
+        и удалением поста."""
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        self.assertCounters(1, 1, 0)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.second_group
+        post.save()
+        self.assertCounters(1, 0, 1)
+        post.group = None
+        post.save()
+        self.assertCounters(1, 0, 0)
+        post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_counters_bulk_create(self):
+        """bulk_create тоже обновляет счётчики."""
+        Post.objects.bulk_create(
+            [Post(
+                author=self.user,
+                text=f'Тестовый текст №{i}',
+                group=self.group if i % 2 else self.second_group,
+            ) for i in range(5)]
+        )
+        self.assertCounters(5, 2, 3)
+
+    def test_counters_cascade(self):
+        """Удаление автора каскадом уменьшает счётчик группы."""
+        Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        self.user.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertFalse(AuthorStats.objects.exists())
+
+
+class FeedEntryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+
+    def assertEntryMatches(self, post):
+        entry = FeedEntry.objects.get(post=post)
+        self.assertEqual(entry.pub_date, post.pub_date)
+        self.assertEqual(entry.author_username, post.author.username)
+        self.assertEqual(entry.group_id, post.group_id)
+        self.assertEqual(
+            entry.group_slug, post.group.slug if post.group else ''
+        )
+        self.assertEqual(entry.text, post.text[:FeedEntry.EXCERPT_LENGTH])
+
+    def test_entry_follows_post(self):
+        """Строка ленты следует за созданием, правкой и удалением поста."""
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        self.assertEntryMatches(post)
+        post.text = 'Т' * (FeedEntry.EXCERPT_LENGTH + 1)
+        post.group = None
+        post.save()
+        self.assertEntryMatches(post)
+        self.assertTrue(FeedEntry.objects.get(post=post).text_truncated)
+        post.delete()
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_entry_bulk_create(self):
+        """bulk_create тоже заполняет ленту."""
+        posts = Post.objects.bulk_create(
+            [Post(
+                author=self.user,
+                text=f'Тестовый текст №{i}',
+                group=self.group if i % 2 else None,
+            ) for i in range(5)]
+        )
+        self.assertEqual(FeedEntry.objects.count(), len(posts))
+        for post in Post.objects.select_related('author', 'group'):
+            self.assertEntryMatches(post)
+
+    def test_entry_follows_author_and_group(self):
+        """Переименование автора и группы и удаление группы
+        обновляют строки ленты."""
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        self.user.username = 'renamed'
+        self.user.save()
+        self.group.slug = 'renamed_slug'
+        self.group.save()
+        post.refresh_from_db()
+        self.assertEntryMatches(post)
+        self.group.delete()
+        post.refresh_from_db()
+        self.assertEntryMatches(post)
+
+    def test_user_save_without_rename_skips_feed(self):
+        """Создание пользователя и смена пароля не трогают ленту."""
+        with CaptureQueriesContext(connection) as queries:
+            user = User.objects.create_user(username='new', password='a')
+            user.set_password('b')
+            user.save()
+        self.assertFalse(
+            [q for q in queries if 'posts_feedentry' in q['sql']]
+        )
+
+    def test_as_post(self):
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        feed_post = FeedEntry.objects.get(post=post).as_post()
+        self.assertEqual(feed_post.pk, post.pk)
+        self.assertEqual(feed_post.author.username, self.user.username)
+        self.assertEqual(feed_post.group.slug, self.group.slug)
@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import search
+from ..models import Post
+
+User = get_user_model()
+
+
+class TestPostSearch(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='auth')
+        self.rare = Post.objects.create(
+            author=self.author, text='Кошка спит на диване.'
+        )
+        self.often = Post.objects.create(
+            author=self.author, text='Кошка, кошка и ещё раз кошка!'
+        )
+        self.dog = Post.objects.create(
+            author=self.author, text='Собака гуляет.'
+        )
+        self.guest_client = Client()
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def search(self, query):
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': query}
+        )
+        return list(response.context['page_obj'])
+
+    def test_results_ranked_by_relevance(self):
+        """Поиск по префиксу слова, релевантные посты первыми."""
+        self.assertEqual(self.search('кош'), [self.often, self.rare])
+        self.assertEqual(self.search(''), [])
+
+    def test_query_syntax_is_escaped(self):
+        """Операторы FTS5 во вводе не ломают запрос."""
+        self.assertEqual(self.search('"кошка" OR NEAR('), [])
+        self.assertEqual(self.search('собака -'), [self.dog])
+
+    def test_index_follows_changes(self):
+        """Правки, удаление и bulk_create сразу видны в поиске."""
+        self.rare.text = 'Попугай спит на диване.'
+        self.rare.save()
+        self.assertEqual(self.search('кошка'), [self.often])
+        self.assertEqual(self.search('попугай'), [self.rare])
+        self.often.delete()
+        self.assertEqual(self.search('кошка'), [])
+        Post.objects.bulk_create([Post(author=self.author, text='Ёжик')])
+        self.assertEqual(len(self.search('ёжик')), 1)
+
+    def test_rebuild_command(self):
+        """rebuild_search_index восстанавливает испорченный индекс."""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.TABLE}_data")
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('собака'), [self.dog])
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через FTS5, а не LIKE."""
+        response = self.admin_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кошка'}
+        )
+        self.assertEqual(
+            set(response.context['cl'].result_list), {self.rare, self.often}
+        )
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class TestSyndicationFeeds(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(
+            author=self.author,
+            text='Тестовый пост группы',
+            group=self.group,
+        )
+        # Адрес ленты и число запросов к БД при ответе из кеша: группу
+        # и автора повторный запрос берёт из LRU-кеша posts.lookups.
+        self.feeds = {}
+        for kind in ('rss', 'atom'):
+            self.feeds[reverse(f'posts:index_{kind}')] = 0
+            self.feeds[reverse(
+                f'posts:group_{kind}', args=(self.group.slug,)
+            )] = 0
+            self.feeds[reverse(
+                f'posts:profile_{kind}', args=(self.author.username,)
+            )] = 0
+
+    def test_feeds_list_posts(self):
+        for url in self.feeds:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('xml', response['Content-Type'])
+                self.assertContains(response, self.post.text)
+                self.assertContains(response, reverse(
+                    'posts:post_detail', args=(self.post.pk,)
+                ))
+
+    def test_cached_and_not_modified(self):
+        """Повторный опрос берёт XML из кеша, а опрос с ETag или
+        Last-Modified получает 304."""
+        for url, queries in self.feeds.items():
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with self.assertNumQueries(queries):
+                    second = self.guest_client.get(url)
+                self.assertEqual(second.content, first.content)
+                with self.assertNumQueries(queries):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=first['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_new_post_invalidates(self):
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.feeds}
+        new_post = Post.objects.create(
+            author=self.author, text='Свежий пост', group=self.group
+        )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, new_post.text)
+
+    def test_unknown_group_or_author(self):
+        for name in ('posts:group_rss', 'posts:profile_atom'):
+            with self.subTest(name=name):
+                response = self.guest_client.get(
+                    reverse(name, args=('nobody',))
+                )
+                self.assertEqual(response.status_code, 404)
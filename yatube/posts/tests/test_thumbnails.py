@@ -0,0 +1,133 @@
+import io
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.templatetags.static import static
+from django.urls import reverse
+from PIL import Image
+
+from core.jobs import Worker
+from core.models import Job
+
+from .. import thumbnails
+from ..models import FeedEntry, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_file(name='small.png', color='red'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class TestThumbnails(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(username='auth')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.placeholder = static('img/thumbnail-placeholder.svg')
+
+    def create_post(self):
+        self.client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с картинкой',
+            'image': image_file(),
+        })
+        return Post.objects.latest('id')
+
+    def make_thumbnails(self):
+        call_command(
+            'make_thumbnails', workers=1,
+            stdout=io.StringIO(), stderr=io.StringIO(),
+        )
+
+    def test_upload_shows_placeholder(self):
+        """Картинка из формы сохраняется, а до обработки ленты
+        показывают заглушку."""
+        post = self.create_post()
+        self.assertRegex(post.image.name, r'^posts/small.*\.png$')
+        self.assertFalse(post.thumbnails_ready)
+        self.assertEqual(list(thumbnails.pending_posts()), [post])
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertContains(response, self.placeholder)
+
+    def test_make_thumbnails(self):
+        """После команды посты и лента ссылаются на готовые миниатюры."""
+        post = self.create_post()
+        # Страница попадает в кеш и должна обновиться после обработки.
+        self.client.get(reverse('posts:main_page'))
+        self.make_thumbnails()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        self.assertTrue(FeedEntry.objects.get().thumbnails_ready)
+        self.assertFalse(thumbnails.pending_posts().exists())
+        pages = (
+            (reverse('posts:main_page'), thumbnails.FEED),
+            (reverse('posts:post_detail', args=(post.id,)),
+             thumbnails.DETAIL),
+        )
+        for url, size in pages:
+            with self.subTest(url=url):
+                thumbnail = thumbnails.backend.thumbnail_file(
+                    post.image.name, size
+                )[3]
+                self.assertTrue(os.path.exists(thumbnail.storage.path(
+                    thumbnail.name
+                )))
+                response = self.client.get(url)
+                self.assertContains(response, thumbnail.url)
+                self.assertNotContains(response, self.placeholder)
+
+    def test_upload_enqueues_thumbnails(self):
+        """Новую картинку обрабатывает очередь задач."""
+        post = self.create_post()
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'posts.thumbnails.make_thumbnails')
+        self.client.post(
+            reverse('posts:post_edit', args=(post.id,)),
+            data={'text': 'Правка текста'},
+        )
+        self.assertEqual(Job.objects.count(), 1)
+        Worker().run_pending()
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+
+    def test_new_image_resets_thumbnails(self):
+        post = self.create_post()
+        self.make_thumbnails()
+        self.client.post(
+            reverse('posts:post_edit', args=(post.id,)),
+            data={'text': post.text, 'image': image_file('new.png', 'blue')},
+        )
+        post.refresh_from_db()
+        self.assertRegex(post.image.name, r'^posts/new.*\.png$')
+        self.assertFalse(post.thumbnails_ready)
+        self.assertFalse(FeedEntry.objects.get().thumbnails_ready)
+
+    def test_broken_image_skipped(self):
+        """Битая картинка не останавливает обработку остальных."""
+        Post.objects.create(
+            author=self.user, text='Битая',
+            image=SimpleUploadedFile('broken.png', b'not an image'),
+        )
+        good = self.create_post()
+        self.make_thumbnails()
+        self.assertEqual(
+            list(thumbnails.pending_posts()),
+            list(Post.objects.exclude(pk=good.pk)),
+        )
@@ -0,0 +1,156 @@
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+)
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post
+from ..utils import (
+    CURSOR_NEXT, CURSOR_PREVIOUS, CastomPaginator, CursorPage,
+    CursorPaginator, WindowedPaginator, encode_cursor,
+)
+
+User = get_user_model()
+
+POSTS_COUNT = settings.POSTS_ON_PAGE * 2 + 3
+
+
+class TestCursorPaginator(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            [Post(
+                author=cls.author,
+                text=f'Тестовый текст №{i}',
+            ) for i in range(POSTS_COUNT)]
+        )
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+
+    def setUp(self):
+        caches['default'].clear()
+        self.guest_client = Client()
+
+    def get_page(self, cursor=''):
+        response = self.guest_client.get(
+            reverse('posts:main_page'), {'cursor': cursor}
+        )
+        return response.context['page_obj']
+
+    def test_walk_forward_and_back(self):
+        """Курсоры ведут по ленте вперёд и назад без пропусков."""
+        pages = [self.get_page()]
+        while pages[-1].has_next():
+            pages.append(self.get_page(pages[-1].next_cursor))
+        walked = [post.pk for page in pages for post in page]
+        self.assertEqual(walked, self.expected)
+        self.assertIsInstance(pages[0], CursorPage)
+        self.assertFalse(pages[0].has_previous())
+        self.assertEqual(len(pages[-1]), 3)
+
+        previous = self.get_page(pages[-1].previous_cursor)
+        self.assertEqual(
+            [post.pk for post in previous], [post.pk for post in pages[-2]]
+        )
+
+    def test_no_count_query(self):
+        """Страница по курсору обходится одним запросом без COUNT(*)."""
+        cursor = self.get_page().next_cursor
+        request = RequestFactory().get('/', {'cursor': cursor})
+        with self.assertNumQueries(1):
+            list(CastomPaginator(request, Post.objects.all()))
+
+    def test_invalid_cursor(self):
+        """Испорченный курсор открывает первую страницу."""
+        page = self.get_page('не-курсор')
+        self.assertEqual(
+            [post.pk for post in page],
+            self.expected[:settings.POSTS_ON_PAGE],
+        )
+
+    def test_cursor_past_feed_ends(self):
+        """Курсор за концом или началом ленты открывает первую страницу
+        на главной, странице группы и профиле."""
+        now = timezone.now()
+        cursors = {
+            'за концом': encode_cursor(
+                CURSOR_NEXT, now - datetime.timedelta(days=3650), 0
+            ),
+            'за началом': encode_cursor(
+                CURSOR_PREVIOUS, now + datetime.timedelta(days=3650), 0
+            ),
+        }
+        group = Group.objects.create(title='Группа', slug='g', description='')
+        Post.objects.create(author=self.author, group=group, text='В группе')
+        urls = (
+            reverse('posts:main_page'),
+            reverse('posts:group_list', args=(group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        )
+        for url in urls:
+            for name, cursor in cursors.items():
+                with self.subTest(url=url, cursor=name):
+                    response = self.guest_client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, 200)
+                    page = response.context['page_obj']
+                    self.assertTrue(len(page))
+                    self.assertFalse(page.has_previous())
+
+    def test_empty_page_has_no_cursors(self):
+        paginator = CursorPaginator(Post.objects.none(), 10)
+        page = CursorPage([], paginator, True, True)
+        self.assertIsNone(page.next_cursor)
+        self.assertIsNone(page.previous_cursor)
+
+    @override_settings(PAGINATOR_MODE='cursor')
+    def test_cursor_mode_setting(self):
+        """Режим cursor включается настройкой PAGINATOR_MODE."""
+        response = self.guest_client.get(reverse('posts:main_page'))
+        page = response.context['page_obj']
+        self.assertIsInstance(page, CursorPage)
+        self.assertContains(response, f'?cursor={page.next_cursor}')
+
+
+class TestWindowedPaginator(SimpleTestCase):
+    def test_elided_page_range(self):
+        """Первая и последняя страницы, окно вокруг текущей, многоточия."""
+        paginator = WindowedPaginator(range(1000), 10)
+        gap = WindowedPaginator.ELLIPSIS
+        cases = {
+            1: [1, 2, 3, gap, 100],
+            4: [1, 2, 3, 4, 5, 6, gap, 100],
+            50: [1, gap, 48, 49, 50, 51, 52, gap, 100],
+            97: [1, gap, 95, 96, 97, 98, 99, 100],
+            100: [1, gap, 98, 99, 100],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    paginator.page(number).elided_page_range, expected
+                )
+        self.assertEqual(
+            WindowedPaginator(range(70), 10).page(4).elided_page_range,
+            list(range(1, 8)),
+        )
+
+    def test_template_renders_window(self):
+        """Шаблон пагинатора выводит только окно страниц."""
+        page_obj = WindowedPaginator(range(500000), 10).page(25000)
+        html = render_to_string(
+            'includes/paginator.html', {'page_obj': page_obj}
+        )
+        self.assertIn('page=24999', html)
+        self.assertIn('page=50000', html)
+        self.assertNotIn('page=24997', html)
+        self.assertEqual(html.count('class="page-item'), 13)
@@ -4,6 +4,9 @@ from django.urls import reverse
 from django import forms
 
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from ..models import Post, Group
 
@@ -11,6 +14,16 @@ User = get_user_model()
 
 POSTS_ON_2ND_PAGE = 3
 POST_CREATE = settings.POSTS_ON_PAGE + POSTS_ON_2ND_PAGE
+# Предельное число запросов к БД для страниц posts у авторизованного
+# пользователя; две из них - сессия и сам пользователь.
+QUERY_BUDGETS = {
+    'posts:main_page': 4,
+    'posts:group_list': 4,
+    'posts:profile': 4,
+    'posts:post_detail': 3,
+    'posts:post_create': 3,
+    'posts:post_edit': 4,
+}
 
 
 class TestViewPosts(TestCase):
@@ -186,3 +199,172 @@ class TestPaginator(TestCase):
         for response, value in response_values.items():
             with self.subTest(response=response):
                 self.assertEqual(len(response.context['page_obj']), value)
+
+
+class TestQueryBudget(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        Post.objects.bulk_create(
+            [Post(
+                author=cls.author,
+                text=f'Тестовый текст №{i}',
+                group=cls.group,
+            ) for i in range(POST_CREATE)]
+        )
+        cls.post = Post.objects.latest('id')
+
+    def setUp(self):
+        self.post_author = Client()
+        self.post_author.force_login(self.author)
+
+    def assertQueryBudget(self, url, budget):
+        with CaptureQueriesContext(connection) as queries:
+            self.post_author.get(url)
+        executed = '\n'.join(query['sql'] for query in queries)
+        self.assertLessEqual(
+            len(queries), budget,
+            f'{url}: {len(queries)} запросов при лимите {budget}:\n'
+            f'{executed}'
+        )
+
+    def test_pages_fit_query_budget(self):
+        """Страницы posts укладываются в лимит запросов к БД,
+        сколько бы постов ни было на странице."""
+        urls = {
+            'posts:main_page': reverse('posts:main_page'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'any_slug': self.group.slug}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.author}
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}
+            ),
+            'posts:post_create': reverse('posts:post_create'),
+            'posts:post_edit': reverse(
+                'posts:post_edit', kwargs={'post_id': self.post.id}
+            ),
+        }
+        self.assertEqual(urls.keys(), QUERY_BUDGETS.keys())
+        for name, url in urls.items():
+            with self.subTest(url=name):
+                self.assertQueryBudget(url, QUERY_BUDGETS[name])
+
+    def test_feeds_read_without_joins(self):
+        """Главная и страница группы выбирают посты из таблицы ленты
+        без соединений с авторами и группами."""
+        for url in (
+            reverse('posts:main_page'),
+            reverse('posts:group_list', kwargs={'any_slug': self.group.slug}),
+        ):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.post_author.get(url)
+                feed_selects = [
+                    query['sql'] for query in queries
+                    if 'FROM "posts_feedentry"' in query['sql']
+                ]
+                self.assertTrue(feed_selects)
+                for sql in feed_selects:
+                    self.assertNotIn('JOIN', sql)
+
+    def test_feeds_without_count(self):
+        """Число постов лент берётся из счётчиков, без COUNT(*)
+        по таблицам постов и ленты."""
+        for url in (
+            reverse('posts:main_page'),
+            reverse('posts:group_list', kwargs={'any_slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+        ):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.post_author.get(url)
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count, POST_CREATE
+                )
+                for query in queries:
+                    self.assertFalse(
+                        'COUNT(' in query['sql'] and (
+                            '"posts_post"' in query['sql']
+                            or '"posts_feedentry"' in query['sql']
+                        ),
+                        query['sql'],
+                    )
+
+
+class TestConditionalGet(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author = User.objects.create_user(username='auth')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(
+            author=self.author,
+            text='Тестовый пост',
+            group=self.group,
+        )
+        self.feeds = {
+            reverse('posts:main_page'): 0,
+            reverse(
+                'posts:group_list', kwargs={'any_slug': self.group.slug}
+            ): 0,
+            reverse('posts:profile', kwargs={'username': self.author}): 0,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}): 1,
+        }
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304 за один запрос
+        к БД или вовсе без них."""
+        for url, queries in self.feeds.items():
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with self.assertNumQueries(queries):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        """После нового поста и правки старого страницы отдаются
+        заново."""
+        etags = {url: self.guest_client.get(url)['ETag'] for url in self.feeds}
+        Post.objects.create(
+            author=self.author, text='Новый пост', group=self.group
+        )
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_post_last_modified(self):
+        """Страница поста отвечает 304 на If-Modified-Since."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        """Гость и авторизованный пользователь получают разные ETag."""
+        url = reverse('posts:main_page')
+        etag = self.guest_client.get(url)['ETag']
+        authorized_client = Client()
+        authorized_client.force_login(self.author)
+        response = authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Cookie', response['Vary'])
@@ -0,0 +1,131 @@
+"""Миниатюры картинок постов, которые готовятся вне запросов.
+
+Страницы не создают миниатюры и не обращаются к хранилищу ключей
+sorl-thumbnail: имя файла миниатюры вычисляется из имени картинки
+и параметров размера, а готовность отмечена флагом
+Post.thumbnails_ready. Пока миниатюр нет, шаблоны показывают заглушку.
+Миниатюры новой картинки делает задача очереди make_thumbnails,
+а накопившиеся - одноимённая команда пулом процессов.
+"""
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.jobs import job
+
+from . import cache
+from .models import FeedEntry, Post
+
+FEED = 'feed'
+DETAIL = 'detail'
+# Размер для sorl-thumbnail и его параметры.
+SIZES = {
+    FEED: ('960x339', {'crop': 'center', 'upscale': True}),
+    DETAIL: ('960', {'upscale': False}),
+}
+
+
+class OfflineThumbnailBackend(ThumbnailBackend):
+    """Делит get_thumbnail sorl-thumbnail на две части: вычисление имени
+    миниатюры для шаблонов и создание файла для воркеров."""
+
+    def options(self, source, options):
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_file(self, name, size):
+        geometry, options = SIZES[size]
+        source = ImageFile(name, default_storage)
+        options = self.options(source, options)
+        return source, geometry, options, ImageFile(
+            self._get_thumbnail_filename(source, geometry, options),
+            default.storage,
+        )
+
+    def url(self, name, size):
+        return self.thumbnail_file(name, size)[3].url
+
+    def create(self, name, size):
+        source, geometry, options, thumbnail = self.thumbnail_file(name, size)
+        source_image = default.engine.get_image(source)
+        try:
+            options['image_info'] = default.engine.get_image_info(
+                source_image
+            )
+            self._create_thumbnail(source_image, geometry, options, thumbnail)
+        finally:
+            default.engine.cleanup(source_image)
+        return thumbnail
+
+
+backend = OfflineThumbnailBackend()
+
+
+def thumbnail_url(post, size):
+    """Адрес готовой миниатюры или None, если её ещё нет."""
+    if not post.image or not post.thumbnails_ready:
+        return None
+    return backend.url(post.image.name, size)
+
+
+def render_thumbnails(name):
+    """Все размеры миниатюр одной картинки; выполняется в воркере."""
+    for size in SIZES:
+        backend.create(name, size)
+    return name
+
+
+def pending_posts():
+    """Посты с картинкой без миниатюр, по частичному индексу."""
+    return Post.objects.filter(thumbnails_ready=False).exclude(
+        image=''
+    ).order_by('id')
+
+
+def mark_ready(post_id, name):
+    """Отмечает миниатюры готовыми, если картинку тем временем
+    не заменили, и сбрасывает кеш лент с этим постом."""
+    post = Post.objects.filter(pk=post_id, image=name).only(
+        'author', 'group'
+    ).first()
+    if post is None:
+        return False
+    # updated меняется, чтобы сменились ETag и Last-Modified поста.
+    Post.objects.filter(pk=post_id, image=name).update(
+        thumbnails_ready=True, updated=timezone.now()
+    )
+    FeedEntry.objects.filter(post_id=post_id, image=name).update(
+        thumbnails_ready=True
+    )
+    cache.bump_post_versions(post)
+    return True
+
+
+@job
+def make_thumbnails(post_id, name):
+    if Post.objects.filter(pk=post_id, image=name).exists():
+        render_thumbnails(name)
+        mark_ready(post_id, name)
+
+
+@receiver(post_save, sender=Post)
+def enqueue_thumbnails(sender, instance, raw, **kwargs):
+    if raw or not instance.image or instance.thumbnails_ready:
+        return
+    previous = instance._previous_state or {}
+    if previous.get('image') != instance.image.name:
+        make_thumbnails.delay(instance.pk, instance.image.name)
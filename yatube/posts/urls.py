@@ -1,14 +1,33 @@
 from django.urls import path
 
-from . import views
+from . import syndication, views
 
 app_name = 'posts'
 
 
 urlpatterns = [
     path('', views.index, name='main_page'),
+    path('rss/', syndication.index_rss, name='index_rss'),
+    path('atom/', syndication.index_atom, name='index_atom'),
     path('group/<slug:any_slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:any_slug>/rss/', syndication.group_rss, name='group_rss'
+    ),
+    path(
+        'group/<slug:any_slug>/atom/', syndication.group_atom,
+        name='group_atom'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/rss/', syndication.author_rss,
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/', syndication.author_atom,
+        name='profile_atom'
+    ),
+    path('search/', views.search_posts, name='search'),
+    path('export/posts/', views.export_posts, name='export'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit')
@@ -1,10 +1,181 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
 
-from yatube.settings import POSTS_ON_PAGE
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
 
-def CastomPaginator(request, posts):
-    paginator = Paginator(posts, POSTS_ON_PAGE)
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(direction, pub_date, pk):
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or pub_date is None:
+        raise InvalidCursor(cursor)
+    return direction, pub_date, pk
+
+
+class WindowedPage(Page):
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(self.number)
+
+
+class WindowedPaginator(Paginator):
+    """Paginator со свёрнутым списком номеров страниц.
+
+    Вместо ссылки на каждую страницу - первые и последние страницы,
+    несколько страниц вокруг текущей и многоточия между ними, как
+    get_elided_page_range в новых версиях Django.
+    """
+    ELLIPSIS = '…'
+    on_each_side = 2
+    on_ends = 1
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number=1):
+        number = self.validate_number(number)
+        num_pages = self.num_pages
+        on_each_side, on_ends = self.on_each_side, self.on_ends
+        if num_pages <= (on_each_side + on_ends) * 2 + 1:
+            return list(self.page_range)
+        pages = []
+        if number > on_each_side + on_ends + 2:
+            pages.extend(range(1, on_ends + 1))
+            pages.append(self.ELLIPSIS)
+            pages.extend(range(number - on_each_side, number + 1))
+        else:
+            pages.extend(range(1, number + 1))
+        if number < num_pages - on_each_side - on_ends - 1:
+            pages.extend(range(number + 1, number + on_each_side + 1))
+            pages.append(self.ELLIPSIS)
+            pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+        else:
+            pages.extend(range(number + 1, num_pages + 1))
+        return pages
+
+
+class CursorPage(Page):
+    """Страница keyset-пагинации: вместо номера - курсоры соседних страниц."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_previous, has_next):
+        super().__init__(object_list, None, paginator)
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.cursor_for(CURSOR_NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.cursor_for(
+            CURSOR_PREVIOUS, self.object_list[0]
+        )
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу (pub_date, id).
+
+    Не выполняет COUNT(*) и не использует OFFSET, поэтому время открытия
+    страницы не зависит от того, насколько она далеко от начала ленты.
+    """
+    date_field = 'pub_date'
+    # По умолчанию - столбец первичного ключа: order_by('pk') у модели,
+    # чей ключ - связь один-к-одному, сортировал бы по полям связанной
+    # модели.
+    key_field = None
+
+    def get_key_field(self):
+        return self.key_field or self.object_list.model._meta.pk.attname
+
+    def cursor_for(self, direction, obj):
+        return encode_cursor(
+            direction,
+            getattr(obj, self.date_field),
+            getattr(obj, self.key_field or 'pk'),
+        )
+
+    def get_page(self, cursor):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def page(self, cursor):
+        date, key = self.date_field, self.get_key_field()
+        queryset = self.object_list.order_by(f'-{date}', f'-{key}')
+        direction = None
+        if cursor:
+            direction, pub_date, pk = decode_cursor(cursor)
+            if direction == CURSOR_NEXT:
+                queryset = queryset.filter(
+                    Q(**{f'{date}__lt': pub_date})
+                    | Q(**{date: pub_date, f'{key}__lt': pk})
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{date}__gt': pub_date})
+                    | Q(**{date: pub_date, f'{key}__gt': pk})
+                ).order_by(date, key)
+        items = list(queryset[:self.per_page + 1])
+        if direction is not None and not items:
+            # Курсор за концом ленты: посты после него удалены
+            # или курсор подделан. Открываем первую страницу.
+            return self.page(None)
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if direction == CURSOR_PREVIOUS:
+            items.reverse()
+            return CursorPage(items, self, has_more, True)
+        return CursorPage(items, self, direction == CURSOR_NEXT, has_more)
+
+
+def CastomPaginator(request, posts, mode=None, count=None):
+    """count - известное заранее число постов (счётчик) или функция,
+    которая его вернёт, чтобы паджинатор не выполнял COUNT(*)."""
+    mode = mode or settings.PAGINATOR_MODE
+    cursor_mode = mode == 'cursor' or 'cursor' in request.GET
+    paginator_class = CursorPaginator if cursor_mode else WindowedPaginator
+    paginator = paginator_class(posts, settings.POSTS_ON_PAGE)
+    if count is not None and not cursor_mode:
+        paginator.count = count() if callable(count) else count
+    if cursor_mode:
+        return paginator.get_page(request.GET.get('cursor'))
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
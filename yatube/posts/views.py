@@ -1,55 +1,203 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+
+from core.page_cache import cache_anonymous_page
 
-from .models import Post, Group, User
+from . import cache, export, feed, lookups, search
+from .models import (
+    AuthorStats, FeedEntry, Post, Group, User, total_posts_count,
+)
 from .forms import PostForm
-from .utils import CastomPaginator
+from .utils import CastomPaginator, WindowedPaginator
+
+
+def feed_queryset():
+    """Посты вместе с авторами и группами - одним запросом."""
+    return Post.objects.select_related('author', 'group')
+
+
+def author_posts_count(author):
+    try:
+        return author.stats.posts_count
+    except AuthorStats.DoesNotExist:
+        return 0
+
+
+def get_group(request, slug):
+    """Группа страницы загружается один раз за запрос: её берут
+    и проверка ETag, и само представление."""
+    if not hasattr(request, 'group'):
+        request.group = lookups.group_by_slug(slug)
+    return request.group
+
+
+def get_author(request, username):
+    if not hasattr(request, 'author'):
+        request.author = lookups.author_by_username(username)
+    return request.author
+
+
+def get_post(request, post_id):
+    if not hasattr(request, 'post'):
+        request.post = get_object_or_404(
+            feed_queryset().select_related('author__stats'), id=post_id
+        )
+    return request.post
+
+
+def index_etag(request):
+    return cache.feed_etag(request, cache.INDEX)
+
+
+def group_etag(request, any_slug):
+    group = get_group(request, any_slug)
+    return cache.feed_etag(request, cache.GROUP, group.pk)
+
 
+def profile_etag(request, username):
+    author = get_author(request, username)
+    return cache.feed_etag(request, cache.AUTHOR, author.pk)
 
+
+def post_etag(request, post_id):
+    # В ETag поста входит версия автора: на странице есть число
+    # его постов.
+    post = get_post(request, post_id)
+    if cache.replicas_may_lag(cache.AUTHOR, post.author_id):
+        return None
+    version = cache.feed_version(cache.AUTHOR, post.author_id)
+    return (
+        f'W/"{version}.{post.updated.timestamp()}.'
+        f'{cache.viewer_tag(request)}"'
+    )
+
+
+def post_last_modified(request, post_id):
+    return get_post(request, post_id).updated
+
+
+def feed_cache_context(request, page_obj, scope, pk=None):
+    return {
+        'feed_cache_key': cache.feed_cache_key(request, page_obj, scope, pk),
+        'feed_cache_alias': settings.FEED_CACHE_ALIAS,
+        'feed_cache_timeout': cache.feed_cache_timeout(scope, pk),
+    }
+
+
+@vary_on_cookie
+@condition(etag_func=index_etag)
+@cache_anonymous_page(index_etag)
 def index(request):
     template = 'posts/index.html'
-    posts = Post.objects.all()
-    page_obj = CastomPaginator(request, posts)
+    # Ленты главной и групп читаются из денормализованной таблицы,
+    # без соединений с авторами и группами.
+    page_obj = feed.as_posts(CastomPaginator(
+        request, FeedEntry.objects.all(), count=total_posts_count
+    ))
     context = {
         'page_obj': page_obj,
+        **feed_cache_context(request, page_obj, cache.INDEX),
     }
     return render(request, template, context)
 
 
+@vary_on_cookie
+@condition(etag_func=group_etag)
+@cache_anonymous_page(group_etag)
 def group_posts(request, any_slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=any_slug)
-    posts = group.posts.all()
-    page_obj = CastomPaginator(request, posts)
+    group = get_group(request, any_slug)
+    entries = FeedEntry.objects.filter(group_id=group.pk)
+    page_obj = feed.as_posts(
+        CastomPaginator(request, entries, count=group.posts_count), group
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
+        **feed_cache_context(request, page_obj, cache.GROUP, group.pk),
     }
     return render(request, template, context)
 
 
+@vary_on_cookie
+@condition(etag_func=profile_etag)
+@cache_anonymous_page(profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = CastomPaginator(request, posts)
+    author = get_author(request, username)
+    posts = feed_queryset().filter(author=author)
+    page_obj = CastomPaginator(
+        request, posts, count=author_posts_count(author)
+    )
     context = {
         'author': author,
         'page_obj': page_obj,
+        **feed_cache_context(request, page_obj, cache.AUTHOR, author.pk),
     }
     return render(request, 'posts/profile.html', context)
 
 
+# Результаты поиска меняются вместе с главной лентой.
+@cache_anonymous_page(index_etag)
+def search_posts(request):
+    query = request.GET.get('q', '')
+    results = search.SearchResults(feed_queryset(), query)
+    paginator = WindowedPaginator(results, settings.POSTS_ON_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'paginator_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def export_posts(request):
+    """Потоковая выгрузка постов для аналитики.
+
+    Параметры: author (username), group (slug), since и until
+    (дата или дата со временем в ISO 8601), format - ndjson или json.
+    """
+    export_format = request.GET.get('format', export.NDJSON)
+    if export_format not in export.CONTENT_TYPES:
+        return HttpResponseBadRequest(f'Неизвестный формат: {export_format}')
+    author = group = None
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    try:
+        posts = export.filter_posts(
+            author, group, request.GET.get('since'), request.GET.get('until')
+        )
+    except export.InvalidFilter as error:
+        return HttpResponseBadRequest(str(error))
+    return StreamingHttpResponse(
+        export.stream(posts, export_format),
+        content_type=export.CONTENT_TYPES[export_format],
+    )
+
+
+@vary_on_cookie
+@condition(etag_func=post_etag, last_modified_func=post_last_modified)
+@cache_anonymous_page(post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_post(request, post_id)
     context = {
         'post': post,
+        'author_posts_count': author_posts_count(post.author),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST)
+    form = PostForm(request.POST, files=request.FILES or None)
     if request.method == 'POST':
         if form.is_valid():
             post = form.save(commit=False)
@@ -62,13 +210,15 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post
+    )
     context = {
         'form': form,
         'is_edit': True,
         'post': post,
     }
-    if request.user != post.author:
+    if request.user.id != post.author_id:
         return redirect('posts:post_detail', post_id=post_id)
     if not form.is_valid():
         return render(request, 'posts/create_post.html', context)
@@ -0,0 +1,51 @@
+"""Бэкенд аутентификации, который берёт пользователя из кеша.
+
+AuthenticationMiddleware на каждом запросе загружает пользователя
+по id из сессии. CachedModelBackend хранит его в кеше USER_CACHE_ALIAS,
+и запрос к auth_user нужен только после изменения пользователя:
+сохранение (в том числе смена пароля), удаление и выход сбрасывают
+запись. Изменения через QuerySet.update сигналов не отправляют и видны
+по истечении USER_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+User = get_user_model()
+
+
+def user_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def user_cache_key(user_id):
+    return f'user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = user_cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache().set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    # Хеш пароля в кеше устарел бы: сессии, которые смена пароля должна
+    # завершить, проверялись бы по старому хешу.
+    user_cache().delete(user_cache_key(instance.pk))
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        user_cache().delete(user_cache_key(user.pk))
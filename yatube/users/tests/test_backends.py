@@ -0,0 +1,61 @@
+from django.contrib.auth import authenticate, get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..backends import user_cache, user_cache_key
+
+User = get_user_model()
+
+
+class CachedUserTest(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user(
+            username='auth', password='old-secret-42'
+        )
+        self.client = Client()
+        self.client.login(username='auth', password='old-secret-42')
+
+    def test_session_and_user_from_cache(self):
+        """Вошедшему пользователю лента не читает ни сессию,
+        ни пользователя из БД."""
+        url = reverse('posts:main_page')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        tables = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('django_session', tables)
+        self.assertNotIn('auth_user', tables)
+
+    def test_password_change_ends_other_sessions(self):
+        other_device = Client()
+        other_device.login(username='auth', password='old-secret-42')
+        other_device.get(reverse('posts:main_page'))
+        self.client.post(reverse('users:password_change_form'), {
+            'old_password': 'old-secret-42',
+            'new_password1': 'new-secret-42',
+            'new_password2': 'new-secret-42',
+        })
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertTrue(response.context['user'].is_authenticated)
+        response = other_device.get(reverse('posts:main_page'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_logout_forgets_user(self):
+        self.client.get(reverse('posts:main_page'))
+        self.assertIsNotNone(user_cache().get(user_cache_key(self.user.pk)))
+        self.client.get(reverse('users:logout'))
+        self.assertIsNone(user_cache().get(user_cache_key(self.user.pk)))
+
+    def test_failed_login_checked_once(self):
+        """Неверный пароль и неизвестное имя проверяются одним бэкендом:
+        один запрос к auth_user."""
+        for username in ('auth', 'nobody'):
+            with self.subTest(username=username):
+                with self.assertNumQueries(1):
+                    user = authenticate(username=username, password='wrong')
+                self.assertIsNone(user)
@@ -22,8 +22,11 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = '04&$oju-a9^ssaro_sm#=+$*@ry)h%4ilq@9bmd3g9!^ai=xdn'
 
+# Профиль окружения: development (по умолчанию) или production.
+YATUBE_ENV = os.environ.get('YATUBE_ENV', 'development')
+
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = YATUBE_ENV != 'production'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -51,6 +54,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PrecompressedStaticMiddleware',
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,7 +72,8 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени отрисовки для Server-Timing.
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -92,6 +100,44 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения. Локально это копии db.sqlite3, их число
+# задаёт YATUBE_DB_REPLICAS, а обновляет команда sync_replicas.
+# Тесты идут без реплик: в TestCase запросы к другим БД запрещены.
+DATABASE_REPLICAS = []
+for number in range(1, int(os.environ.get('YATUBE_DB_REPLICAS', 0)) + 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.replica{number}.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# PRAGMA для каждого нового соединения SQLite (см. core/db.py).
+SQLITE_PRODUCTION_PRAGMAS = {
+    # Читатели не ждут писателя, писатель не ждёт читателей.
+    'journal_mode': 'wal',
+    # В режиме WAL normal не теряет согласованность при сбое,
+    # а fsync делается только на контрольных точках.
+    'synchronous': 'normal',
+    # Отрицательное значение - в килобайтах: 64 МБ кеша страниц.
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+    # Сколько миллисекунд ждать блокировку, прежде чем выдать
+    # "database is locked".
+    'busy_timeout': 5000,
+}
+SQLITE_PRAGMAS = {}
+if YATUBE_ENV == 'production':
+    SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+    for database in DATABASES.values():
+        # Постоянные соединения с проверкой перед каждым запросом.
+        database['CONN_MAX_AGE'] = 600
+        database['CONN_HEALTH_CHECKS'] = True
+# Сколько секунд после записи посетитель читает из основной БД.
+REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -128,6 +174,89 @@ USE_TZ = True
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:main_page'
 POSTS_ON_PAGE = 10
+# 'pages' - номера страниц, 'cursor' - keyset-пагинация без COUNT(*)
+PAGINATOR_MODE = 'pages'
+# Сколько постов выгрузка читает из БД и отдаёт клиенту за раз.
+EXPORT_CHUNK_SIZE = 2000
+
+# Кеш отрисованных лент. Для нескольких процессов укажите общий
+# бэкенд, например memcached или redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube',
+    },
+}
+FEED_CACHE_ALIAS = 'default'
+FEED_CACHE_TIMEOUT = 60 * 15
+
+# Сессии читаются из кеша, а пишутся и в кеш, и в БД: после очистки
+# кеша они не теряются.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'default'
+# Пользователь запроса тоже берётся из кеша (users/backends.py).
+# Бэкенд один: с двумя неудачный вход проверял бы пароль дважды.
+# Сессии, начатые с ModelBackend, после перехода требуют входа заново.
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TIMEOUT = 60 * 15
+# Целые страницы для гостей (core/page_cache.py); срок в секундах,
+# 0 - не кешировать.
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = 60 * 15
+# Страницу и ленту RSS/Atom новой версии собирает один запрос
+# (core/single_flight.py). Через сколько секунд блокировку пропавшего
+# сборщика займёт другой запрос и сколько секунд ждать сборки тем,
+# кому нечего отдать из кеша.
+SINGLE_FLIGHT_LOCK_TIMEOUT = 30
+SINGLE_FLIGHT_WAIT = 2
+# LRU-кеш групп и авторов в памяти каждого процесса (posts/lookups.py):
+# сколько объектов хранить и сколько секунд. 0 - не кешировать.
+LOOKUP_CACHE_SIZE = 1000
+LOOKUP_CACHE_TIMEOUT = 60
+
+# Сжатие ответов (core.middleware.CompressionMiddleware). Уровни:
+# gzip 1-9, brotli 0-11; ответы короче порога в байтах не сжимаются.
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_LEVEL = 5
+COMPRESSION_MIN_LENGTH = 500
+
+# Доля запросов (0..1), для которых ServerTimingMiddleware замеряет
+# SQL и шаблоны; под нагрузкой достаточно 0.01.
+SERVER_TIMING_SAMPLE_RATE = 1.0
+if YATUBE_ENV == 'production':
+    SERVER_TIMING_SAMPLE_RATE = 0.01
+
+# Строки с замерами пишутся в логгер yatube.performance с уровнем INFO;
+# чтобы они попадали в консоль, понизьте уровень логгера до INFO.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yatube.performance': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Очередь фоновых задач (core/jobs.py), выполняет команда run_jobs.
+JOBS_WORKER_THREADS = 4
+JOBS_MAX_ATTEMPTS = 5
+# Пауза перед повтором: JOBS_RETRY_DELAY * 2 ** (попытка - 1) секунд,
+# не больше JOBS_RETRY_MAX_DELAY.
+JOBS_RETRY_DELAY = 10
+JOBS_RETRY_MAX_DELAY = 60 * 60
+# Через сколько секунд задачу пропавшего воркера заберёт другой.
+JOBS_TIMEOUT = 5 * 60
+# Сколько секунд хранить выполненные задачи для job_stats.
+JOBS_KEEP_DONE = 24 * 60 * 60
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
@@ -136,3 +265,16 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# Отдавать статику из STATIC_ROOT самим Django, со сжатыми копиями
+# и кешированием на год (core.middleware.PrecompressedStaticMiddleware).
+SERVE_STATIC = False
+if YATUBE_ENV == 'production':
+    # collectstatic добавляет хеш содержимого в имена файлов
+    # и записывает рядом их сжатые копии .gz и .br.
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+    SERVE_STATIC = True
+
+# Загруженные картинки постов и их миниатюры (команда make_thumbnails).
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')